@@ -0,0 +1,180 @@
+import copy
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import torch
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.save_util import recursive_getattr, save_to_zip_file
+
+
+def _detach_copy(obj):
+    """Recursively copies tensors to CPU so the snapshot no longer aliases live training state."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return {k: _detach_copy(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_detach_copy(v) for v in obj)
+    return copy.deepcopy(obj)
+
+
+def snapshot_model(model):
+    """
+    Takes an in-memory copy of everything `model.save` would write.
+
+    Mirrors `BaseAlgorithm.save` but stops before touching the disk, so the
+    returned snapshot can be written later (e.g. on another thread).
+
+    Returns:
+        tuple: (data, params, pytorch_variables) ready for `save_to_zip_file`.
+    """
+    data = model.__dict__.copy()
+    exclude = set(model._excluded_save_params())
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    for torch_var in state_dicts_names + torch_variable_names:
+        exclude.add(torch_var.split(".")[0])
+    for param_name in exclude:
+        data.pop(param_name, None)
+    data = copy.deepcopy(data)
+
+    pytorch_variables = None
+    if torch_variable_names:
+        pytorch_variables = {
+            name: _detach_copy(recursive_getattr(model, name)) for name in torch_variable_names
+        }
+
+    params = _detach_copy(model.get_parameters())
+    return data, params, pytorch_variables
+
+
+class AsyncCheckpointCallback(BaseCallback):
+    """
+    Checkpoints the model every `save_freq` calls without blocking the env loop.
+
+    The policy/optimizer state is copied in memory on the training thread (fast),
+    and the zip is written by a single background writer thread. Only the last
+    `keep_last` periodic checkpoints are kept on disk, plus `<prefix>_best.zip`
+    for the snapshot with the highest mean episode reward (needs a `Monitor` wrapper).
+
+    Snapshot and write latencies (ms) are logged under `checkpoint/`.
+    """
+
+    def __init__(self, save_freq, save_path, name_prefix="rl_model", keep_last=3, verbose=0):
+        super().__init__(verbose)
+        self.save_freq = save_freq
+        self.save_path = save_path
+        self.name_prefix = name_prefix
+        self.keep_last = keep_last
+
+        self.best_mean_reward = -np.inf
+        self.snapshot_latencies = []
+        self.write_latencies = []
+
+        self._kept_paths = deque()
+        self._pending = queue.Queue()
+        self._completed = queue.Queue()
+        self._writer = None
+
+    # --- Writer thread ---
+    def _start_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                self._pending.task_done()
+                break
+            path, snapshot, is_best, rotate = job
+            start = time.perf_counter()
+            try:
+                data, params, pytorch_variables = snapshot
+                save_to_zip_file(path, data=data, params=params, pytorch_variables=pytorch_variables)
+                if is_best:
+                    shutil.copyfile(path, os.path.join(self.save_path, f"{self.name_prefix}_best.zip"))
+                if rotate:
+                    self._rotate(path)
+                self._completed.put((path, (time.perf_counter() - start) * 1000.0, None))
+            except Exception as e:
+                self._completed.put((path, (time.perf_counter() - start) * 1000.0, e))
+            finally:
+                self._pending.task_done()
+
+    def _rotate(self, path):
+        self._kept_paths.append(path)
+        while len(self._kept_paths) > self.keep_last:
+            old_path = self._kept_paths.popleft()
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+    def _drain_completed(self):
+        while True:
+            try:
+                path, write_ms, error = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            self.write_latencies.append(write_ms)
+            if error is not None:
+                print(f"Warning: Checkpoint write failed for {path}: {error}")
+                continue
+            if getattr(self, "model", None) is not None:
+                self.logger.record("checkpoint/write_ms", write_ms)
+            if self.verbose >= 1:
+                print(f"Saved model checkpoint to {path} ({write_ms:.1f} ms, background)")
+
+    # --- Snapshotting (training thread) ---
+    def _enqueue(self, model, path, rotate):
+        start = time.perf_counter()
+        snapshot = snapshot_model(model)
+        snapshot_ms = (time.perf_counter() - start) * 1000.0
+        self.snapshot_latencies.append(snapshot_ms)
+
+        is_best = False
+        if rotate and len(model.ep_info_buffer) > 0:
+            mean_reward = float(np.mean([ep_info["r"] for ep_info in model.ep_info_buffer]))
+            if mean_reward > self.best_mean_reward:
+                self.best_mean_reward = mean_reward
+                is_best = True
+
+        self._start_writer()
+        self._pending.put((path, snapshot, is_best, rotate))
+        return snapshot_ms
+
+    def _init_callback(self):
+        if self.save_path is not None:
+            os.makedirs(self.save_path, exist_ok=True)
+        self._start_writer()
+
+    def _on_step(self):
+        self._drain_completed()
+        if self.n_calls % self.save_freq == 0:
+            path = os.path.join(self.save_path, f"{self.name_prefix}_{self.num_timesteps}_steps.zip")
+            snapshot_ms = self._enqueue(self.model, path, rotate=True)
+            self.logger.record("checkpoint/snapshot_ms", snapshot_ms)
+        return True
+
+    def save_final(self, model, path):
+        """Queues a final (non-rotated) save of `model` to `path` (`.zip` appended if missing)."""
+        if not path.endswith(".zip"):
+            path = f"{path}.zip"
+        self._enqueue(model, path, rotate=False)
+
+    def close(self):
+        """Waits for queued writes to finish and stops the writer thread."""
+        if self._writer is not None and self._writer.is_alive():
+            self._pending.put(None)
+            self._writer.join()
+        self._drain_completed()
+        if self.write_latencies:
+            print(f"Checkpoint writes: {len(self.write_latencies)}, "
+                  f"mean snapshot {np.mean(self.snapshot_latencies):.1f} ms, "
+                  f"mean write {np.mean(self.write_latencies):.1f} ms (off the env loop)")
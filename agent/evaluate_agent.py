@@ -1,5 +1,6 @@
 import os
 import time
+import numpy as np
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.vec_env import DummyVecEnv
@@ -9,6 +10,7 @@ from stable_baselines3.common.vec_env import DummyVecEnv
 # import config
 
 from subway_ai.env.subway_env import SubwayEnv  # Absolute import
+from subway_ai.env.wrappers import wrap_env
 import subway_ai.config as config
 
 def evaluate_agent():
@@ -22,7 +24,7 @@ def evaluate_agent():
         return
 
     # Create environment for evaluation (with rendering)
-    env_lambda = lambda: SubwayEnv(render_mode="human") # Render the view
+    env_lambda = lambda: wrap_env(SubwayEnv(render_mode="human"), trace_tag="eval") # Render the view
     vec_env = make_vec_env(env_lambda, n_envs=1, vec_env_cls=DummyVecEnv) # Only 1 env for eval
 
     # Load the trained model
@@ -41,7 +43,7 @@ def evaluate_agent():
     print("IMPORTANT: Ensure the game window has focus!")
 
     for episode in range(config.NUM_EVAL_EPISODES):
-        obs, _ = vec_env.reset() # Get initial observation
+        obs = vec_env.reset() # Get initial observation (VecEnv API: obs only)
         done = False
         episode_reward = 0
         step = 0
@@ -54,8 +56,7 @@ def evaluate_agent():
             # Use deterministic=True for evaluation (agent uses best action)
             action, _states = model.predict(obs, deterministic=True)
 
-            obs, reward, terminated, truncated, info = vec_env.step(action)
-            done = terminated or truncated # Episode ends if terminated or truncated
+            obs, reward, done, info = vec_env.step(action) # VecEnv API: done = terminated or truncated
 
             episode_reward += reward[0] # Reward is scalar here since n_envs=1
             step += 1
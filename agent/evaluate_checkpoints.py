@@ -0,0 +1,160 @@
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import subway_ai.config as config
+from subway_ai.env.simulator import SIM_RULE_SETS, VectorSubwaySim, load_recorded_rows
+
+LEADERBOARD_FIELDS = [
+    "rank", "checkpoint", "rules", "episode_source", "episodes", "mean_reward", "std_reward",
+    "p10_reward", "p50_reward", "p90_reward", "mean_length", "max_length",
+    "decisions_per_sec", "eval_seconds",
+]
+
+# What a leaderboard score means under each simulator rule set (see VectorSubwaySim)
+RULES_CAVEATS = {
+    "dodge": "game rules, not SubwayEnv's: not comparable with `evaluate --live`",
+    "subway_env": "SubwayEnv rules: lethal spawns end episodes whatever the policy does, so checkpoints barely differ",
+    "subway_env_coins": "SubwayEnv rewards without lethal spawns: ranks coin collection only",
+}
+
+
+def find_checkpoints(model_dir=config.MODEL_DIR):
+    """Returns every `.zip` checkpoint in `model_dir`, sorted by name."""
+    return sorted(glob.glob(os.path.join(model_dir, "*.zip")))
+
+
+def score_checkpoint(model_path, n_episodes, seed, recorded_path=None, rules=None):
+    """
+    Scores one checkpoint on simulated (or recorded) episodes.
+
+    All episodes are stepped together, so each step issues a single batched
+    `predict` over the still-running episodes instead of one call per episode.
+    Runs inside a worker process; imports torch/SB3 lazily for that reason.
+
+    Returns:
+        dict: One leaderboard row (without rank).
+    """
+    import torch
+    from stable_baselines3 import PPO
+
+    torch.set_num_threads(1) # One core per worker; the pool provides the parallelism
+    start = time.perf_counter()
+    model = PPO.load(model_path, device="cpu")
+
+    lane_rows = load_recorded_rows(recorded_path) if recorded_path else None
+    if lane_rows is not None:
+        n_episodes = len(lane_rows)
+    sim = VectorSubwaySim(n_episodes, lane_rows=lane_rows, seed=seed, rules=rules)
+
+    obs = sim.reset()
+    actions = np.full(n_episodes, 4, dtype=np.int64) # No-op for finished episodes
+    decisions = 0
+    inference_time = 0.0
+    while not sim.done.all():
+        active = ~sim.done
+        t0 = time.perf_counter()
+        actions[active], _ = model.predict(obs[active], deterministic=True)
+        inference_time += time.perf_counter() - t0
+        decisions += int(active.sum())
+        actions[~active] = 4
+        obs, _, _ = sim.step(actions)
+
+    rewards = sim.episode_rewards
+    lengths = sim.steps
+    p10, p50, p90 = np.quantile(rewards, [0.1, 0.5, 0.9])
+    return {
+        "checkpoint": os.path.basename(model_path),
+        "rules": sim.rules,
+        "episode_source": recorded_path or "random",
+        "episodes": n_episodes,
+        "mean_reward": float(rewards.mean()),
+        "std_reward": float(rewards.std()),
+        "p10_reward": float(p10),
+        "p50_reward": float(p50),
+        "p90_reward": float(p90),
+        "mean_length": float(lengths.mean()),
+        "max_length": int(lengths.max()),
+        "decisions_per_sec": decisions / inference_time if inference_time > 0 else 0.0,
+        "eval_seconds": time.perf_counter() - start,
+    }
+
+
+def write_leaderboard(rows, path):
+    """Writes leaderboard rows (sorted by mean reward, best first) to a CSV file."""
+    rows = sorted(rows, key=lambda row: row["mean_reward"], reverse=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS)
+        writer.writeheader()
+        for rank, row in enumerate(rows, start=1):
+            writer.writerow({"rank": rank, **row})
+    return rows
+
+
+def evaluate_checkpoints(model_dir=config.MODEL_DIR, n_episodes=config.EVAL_SIM_EPISODES,
+                         recorded_path=None, workers=config.EVAL_WORKERS, seed=0,
+                         leaderboard_path=None, rules=None):
+    """
+    Scores every checkpoint in `model_dir` offline, one checkpoint per worker process.
+
+    Every checkpoint sees the same simulated episodes (same seed), so the ranking
+    compares policies rather than luck. Pass `recorded_path` to replay recorded
+    lane states instead of random ones. `rules` selects the simulator rule set
+    (default `SIM_RULES`); it and the episode source are written to every row.
+
+    Returns:
+        list: Leaderboard rows, best first.
+    """
+    print("----- Starting Checkpoint Evaluation -----")
+    checkpoints = find_checkpoints(model_dir)
+    if not checkpoints:
+        print(f"Error: No checkpoints (*.zip) found in {model_dir}")
+        return []
+
+    leaderboard_path = leaderboard_path or os.path.join(model_dir, config.LEADERBOARD_FILENAME)
+    rules = rules or config.SIM_RULES
+    if rules not in SIM_RULE_SETS:
+        print(f"Error: Unknown simulator rules '{rules}'. Use one of {', '.join(SIM_RULE_SETS)}.")
+        return []
+    workers = workers or min(len(checkpoints), os.cpu_count() or 1)
+    source = f"recorded episodes from {recorded_path}" if recorded_path else f"{n_episodes} simulated episodes"
+    print(f"Scoring {len(checkpoints)} checkpoints on {source} under '{rules}' rules with {workers} workers...")
+
+    rows = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(score_checkpoint, path, n_episodes, seed, recorded_path, rules): path
+            for path in checkpoints
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                row = future.result()
+            except Exception as e:
+                print(f"  Warning: Could not evaluate {os.path.basename(path)}: {e}")
+                continue
+            rows.append(row)
+            print(f"  {row['checkpoint']}: mean {row['mean_reward']:.2f}, "
+                  f"p50 {row['p50_reward']:.2f}, len {row['mean_length']:.0f}, "
+                  f"{row['decisions_per_sec']:.0f} decisions/s")
+
+    if not rows:
+        print("No checkpoints could be evaluated.")
+        return []
+
+    rows = write_leaderboard(rows, leaderboard_path)
+    print(f"\n----- Evaluation Finished in {time.perf_counter() - start:.1f}s -----")
+    print(f"Best checkpoint: {rows[0]['checkpoint']} (mean reward {rows[0]['mean_reward']:.2f} on {source} "
+          f"under '{rules}' rules - {RULES_CAVEATS[rules]})")
+    print(f"Leaderboard written to {leaderboard_path}")
+    return rows
+
+
+# Example usage: python -m subway_ai.agent.evaluate_checkpoints
+if __name__ == "__main__":
+    evaluate_checkpoints()
@@ -2,7 +2,6 @@ import os
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
 from stable_baselines3.common.vec_env import DummyVecEnv # Use Dummy for GUI interaction
-from stable_baselines3.common.callbacks import CheckpointCallback
 from stable_baselines3.common.monitor import Monitor
 import torch # Check if GPU is available
 
@@ -11,25 +10,29 @@ import torch # Check if GPU is available
 # import config
 
 from subway_ai.env.subway_env import SubwayEnv  # Absolute import
+from subway_ai.env.wrappers import wrap_env
+from subway_ai.agent.callbacks import AsyncCheckpointCallback
 import subway_ai.config as config
 
 def train_agent():
     """Configures and trains the PPO agent."""
     print("----- Starting Training -----")
+    config.ensure_dirs()
     print(f"PyTorch using device: {'cuda' if torch.cuda.is_available() else 'cpu'}")
 
     # Create the vectorized environment
     # Lambda function ensures each environment gets the config correctly
-    env_lambda = lambda: Monitor(SubwayEnv(render_mode=None)) # No rendering during training
+    env_lambda = lambda: Monitor(wrap_env(SubwayEnv(render_mode=None), trace_tag="train")) # No rendering during training
     vec_env = make_vec_env(env_lambda, n_envs=config.N_ENVS, vec_env_cls=DummyVecEnv)
 
     # Callback for saving models periodically
-    checkpoint_callback = CheckpointCallback(
+    # Snapshots in memory and writes on a background thread so the live game never waits on disk I/O
+    checkpoint_callback = AsyncCheckpointCallback(
         save_freq=max(config.SAVE_FREQ // config.N_ENVS, 1), # Adjust freq based on n_envs
         save_path=config.MODEL_DIR,
         name_prefix=config.MODEL_FILENAME,
-        save_replay_buffer=False, # Not needed for PPO
-        save_vecnormalize=False   # Not using VecNormalize here
+        keep_last=config.CHECKPOINT_KEEP_LAST,
+        verbose=1
     )
 
     # Define the PPO model
@@ -65,11 +68,12 @@ def train_agent():
     except KeyboardInterrupt:
         print("\nTraining interrupted by user.")
     finally:
-        # Save the final model
+        # Save the final model (snapshot now, written in the background while the env shuts down)
         final_model_path = os.path.join(config.MODEL_DIR, f"{config.MODEL_FILENAME}_final")
-        model.save(final_model_path)
-        print(f"\nFinal model saved to {final_model_path}.zip")
+        checkpoint_callback.save_final(model, final_model_path)
         vec_env.close() # Close the environment
+        checkpoint_callback.close() # Wait for pending checkpoint writes
+        print(f"\nFinal model saved to {final_model_path}.zip")
 
     print("\n----- Training Finished -----")
     print(f"Models saved in: {config.MODEL_DIR}")
@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+# cli.py - Single entry point for all Subway Surfers AI tasks.
+#
+# Usage: python cli.py <command> [options]   (or: python -m subway_ai.cli <command>)
+#   train      Train the PPO agent on the live game
+#   evaluate   Rank all checkpoints offline (default) or play one live (--live)
+#   pipeline   Play one model live with capture, detection and policy in separate processes
+#   bench      Measure detection cost (detect), coin detection (coins) or cold start (startup)
+#   record     Save frames of the game region to disk
+#   calibrate  Show the mouse position, or live-test a template (--template)
+#   export     Export a trace as recorded episodes, or a policy's weights
+#
+# Only the standard library is imported at module level. Each command imports
+# what it needs (torch, stable-baselines3, cv2, mss, pyautogui) inside its handler.
+
+import time
+_CLI_START = time.perf_counter()
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Make `subway_ai.*` (parent dir) and plain `config` (this dir) importable
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+for _path in (os.path.dirname(_ROOT), _ROOT):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# Modules each command imports before doing any work (used by `bench startup`)
+COMMAND_IMPORTS = {
+    "train": ["subway_ai.agent.train_agent"],
+    "evaluate": ["subway_ai.agent.evaluate_checkpoints"],
+    "evaluate --live": ["subway_ai.agent.evaluate_agent"],
+    "pipeline": ["subway_ai.pipeline.live_pipeline"],
+    "bench": ["cv2", "subway_ai.detection.state_extractor"],
+    "record": ["mss", "cv2"],
+    "calibrate": ["pyautogui"],
+    "export": ["subway_ai.tracing.analytics"],
+}
+
+
+def _report_startup(command):
+    """Prints how long the CLI took from start until `command` had its imports loaded."""
+    print(f"[cli] '{command}' ready in {(time.perf_counter() - _CLI_START) * 1000.0:.0f} ms (imports included)")
+
+
+def _validate_config(require_region=True):
+    import subway_ai.config as config
+    try:
+        config.validate(require_region=require_region)
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return False
+    return True
+
+
+# --- Commands ---
+def cmd_train(args):
+    if not _validate_config():
+        return 1
+    from subway_ai.agent.train_agent import train_agent
+    _report_startup("train")
+    train_agent()
+    return 0
+
+
+def cmd_evaluate(args):
+    if args.live:
+        if not _validate_config():
+            return 1
+        from subway_ai.agent.evaluate_agent import evaluate_agent
+        _report_startup("evaluate --live")
+        evaluate_agent()
+        return 0
+
+    if not _validate_config(require_region=False):
+        return 1
+    import subway_ai.config as config
+    from subway_ai.agent.evaluate_checkpoints import evaluate_checkpoints
+    _report_startup("evaluate")
+    rows = evaluate_checkpoints(model_dir=args.model_dir or config.MODEL_DIR,
+                                n_episodes=args.episodes or config.EVAL_SIM_EPISODES,
+                                recorded_path=args.recorded,
+                                workers=args.workers or config.EVAL_WORKERS,
+                                rules=args.rules)
+    return 0 if rows else 1
+
+
+def cmd_pipeline(args):
+    if not _validate_config():
+        return 1
+    import subway_ai.config as config
+    from subway_ai.pipeline.live_pipeline import run_pipeline
+    _report_startup("pipeline")
+    started = run_pipeline(model_path=args.model,
+                           n_detect_workers=args.workers or config.PIPELINE_DETECT_WORKERS,
+                           split=args.split or config.PIPELINE_SPLIT,
+                           duration=args.duration)
+    return 0 if started else 1
+
+
+def _bench_startup(args):
+    """Times each command's imports in a fresh interpreter (true cold start, nothing cached in-process)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(_ROOT), _ROOT, env.get("PYTHONPATH", "")])
+    print(f"Cold-start import time per command ({args.repeat} run(s) each, fresh interpreter):")
+    baseline_code = "import time; t = time.perf_counter(); import subway_ai.config; print(time.perf_counter() - t)"
+    commands = {"(config only)": None, **COMMAND_IMPORTS}
+    for command, modules in commands.items():
+        code = baseline_code if modules is None else (
+            "import time; t = time.perf_counter(); " + "; ".join(f"import {m}" for m in modules)
+            + "; print(time.perf_counter() - t)")
+        timings = []
+        for _ in range(args.repeat):
+            result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+            if result.returncode != 0:
+                error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+                timings = None
+                print(f"  {command:<18} failed: {error}")
+                break
+            timings.append(float(result.stdout.strip().splitlines()[-1]) * 1000.0)
+        if timings:
+            print(f"  {command:<18} {min(timings):8.0f} ms (best of {len(timings)})")
+    return 0
+
+
+def _load_frames(args, flags):
+    import glob
+    import cv2
+    paths = sorted(glob.glob(os.path.join(args.frames, "**", "*.jpg"), recursive=True)
+                   + glob.glob(os.path.join(args.frames, "**", "*.png"), recursive=True))[:args.limit]
+    frames = [frame for frame in (cv2.imread(p, flags) for p in paths) if frame is not None]
+    if not frames:
+        print(f"Error: No readable .jpg/.png frames found under {args.frames}")
+    return frames
+
+
+def _match_coins(boxes, coins, y_start):
+    """
+    Scores detections against labelled coins. A detection is correct if a
+    labelled coin centre lies inside its box, and a labelled coin is found if it
+    lies inside any box. Only detections and labels centred at or below `y_start`
+    are scored.
+
+    Returns:
+        tuple: (correct detections, detections, found coins, labelled coins)
+    """
+    boxes = [box for box in boxes if box[1] + box[3] / 2 >= y_start]
+    inside = [[x <= cx <= x + w and y <= cy <= y + h for cx, cy, _ in coins] for x, y, w, h in boxes]
+    labelled = [i for i, (_, cy, _) in enumerate(coins) if cy >= y_start]
+    found = sum(any(row[i] for row in inside) for i in labelled)
+    return sum(any(row) for row in inside), len(boxes), found, len(labelled)
+
+
+def _bench_coins(args):
+    """
+    Compares colour-mask coin detection with grayscale coin template matching on
+    the hand-labelled frames in COIN_LABELS_FILE: precision/recall and time per
+    frame. Scores are reported on the held-out frames, which were not used to
+    tune the colour thresholds; the tuning frames' score is shown for reference.
+    """
+    import json
+    import cv2
+    import subway_ai.config as config
+    from subway_ai.detection.coin_detector import detect_coins
+    from subway_ai.detection.template_matcher import match_template
+    _report_startup("bench coins")
+
+    labels_path = args.labels or config.COIN_LABELS_FILE
+    if not os.path.isfile(labels_path):
+        print(f"Error: Coin labels file not found: {labels_path}")
+        return 1
+    with open(labels_path) as f:
+        labels = json.load(f)
+    if "held_out" not in labels:
+        print(f"Error: {labels_path} has no 'held_out' frames (expected 'tuning' and 'held_out' sets).")
+        return 1
+    frames_dir = os.path.dirname(labels_path)
+
+    def load(frame_labels):
+        # Capture delivers BGRA, so both paths start from BGRA
+        frames = [(cv2.imread(os.path.join(frames_dir, path), cv2.IMREAD_COLOR), coins)
+                  for path, coins in frame_labels.items()]
+        return [(cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA), coins) for frame, coins in frames if frame is not None]
+
+    held_out = load(labels["held_out"])
+    tuning = load(labels.get("tuning", {}))
+    if not held_out:
+        print(f"Error: None of the held-out frames listed in {labels_path} could be read.")
+        return 1
+    template_path = os.path.join(config.TEMPLATE_DIR, config.COIN_TEMPLATE_FILE)
+    template = cv2.imread(template_path, cv2.IMREAD_GRAYSCALE)
+    n_coins = sum(len(coins) for _, coins in held_out)
+    print(f"\nBenchmarking coin detection on {len(held_out)} held-out frames ({n_coins} coins) from {labels_path}...")
+
+    def report(name, detect, frames):
+        totals = [0, 0, 0, 0]
+        elapsed = 0.0
+        for frame, coins in frames:
+            start = time.perf_counter()
+            boxes = detect(frame)
+            elapsed += time.perf_counter() - start
+            y_start = int(frame.shape[0] * config.DANGER_ZONE_Y_START)
+            totals = [t + s for t, s in zip(totals, _match_coins(boxes, coins, y_start))]
+        correct, detections, found, labelled = totals
+        precision = correct / detections if detections else 0.0
+        recall = found / labelled if labelled else 0.0
+        ms = elapsed * 1000.0 / len(frames)
+        print(f"  {name:<24} {ms:7.2f} ms/frame, precision {precision:.2f} ({correct}/{detections}), "
+              f"recall {recall:.2f} ({found}/{labelled})")
+        return ms
+
+    detect_color = lambda frame: detect_coins(frame)["boxes"].tolist()
+    color_ms = report("color mask + components:", detect_color, held_out)
+    if template is None:
+        print(f"  template matching:       skipped (could not load {template_path})")
+    else:
+        template_ms = report("template matching:", lambda frame: [
+            (x, y, w, h) for (x, y), w, h, _ in match_template(cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY), template,
+                                                               threshold=config.TEMPLATE_MATCH_THRESHOLD)], held_out)
+        print(f"  speedup: {template_ms / color_ms:.1f}x")
+    if tuning:
+        print(f"\nFor reference, on the {len(tuning)} frames the colour thresholds were tuned on:")
+        report("color mask + components:", detect_color, tuning)
+    return 0
+
+
+def _bench_detect(args):
+    import cv2
+    import numpy as np
+    import subway_ai.config as config
+    from subway_ai.detection.template_matcher import load_templates, match_template
+    from subway_ai.detection.state_extractor import extract_state
+    _report_startup("bench")
+
+    frames = _load_frames(args, cv2.IMREAD_GRAYSCALE)
+    if not frames:
+        return 1
+    templates = load_templates()
+    print(f"\nBenchmarking detection on {len(frames)} frames from {args.frames}...")
+
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        extract_state(frame, templates)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    p50, p95 = np.percentile(timings, [50, 95])
+    print(f"  extract_state: mean {np.mean(timings):.2f} ms, p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+
+    for name, template in templates.items():
+        start = time.perf_counter()
+        for frame in frames:
+            match_template(frame, template, threshold=config.TEMPLATE_MATCH_THRESHOLD)
+        print(f"  {name:<14} {(time.perf_counter() - start) * 1000.0 / len(frames):.2f} ms/frame")
+    return 0
+
+
+def cmd_bench(args):
+    if args.target == "startup":
+        return _bench_startup(args)
+    if args.target == "coins":
+        return _bench_coins(args)
+    return _bench_detect(args)
+
+
+def cmd_record(args):
+    if not _validate_config():
+        return 1
+    import cv2
+    import mss
+    import numpy as np
+    import subway_ai.config as config
+    _report_startup("record")
+
+    out_dir = os.path.join(config.RECORD_DIR, time.strftime("%Y%m%d_%H%M%S"))
+    config.ensure_dirs(out_dir)
+    fps = args.fps or config.RECORD_FPS
+    interval = 1.0 / fps
+    print(f"Recording {args.seconds}s at {fps} fps to {out_dir} (Ctrl+C to stop)...")
+    n_frames = 0
+    deadline = time.perf_counter() + args.seconds
+    try:
+        with mss.mss() as sct:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                frame = cv2.cvtColor(np.asarray(sct.grab(config.GAME_REGION)), cv2.COLOR_BGRA2BGR)
+                cv2.imwrite(os.path.join(out_dir, f"frame_{n_frames:06d}.png"), frame)
+                n_frames += 1
+                remaining = interval - (time.perf_counter() - start)
+                if remaining > 0:
+                    time.sleep(remaining)
+    except KeyboardInterrupt:
+        print("\nRecording interrupted by user.")
+    print(f"Saved {n_frames} frames to {out_dir}")
+    return 0
+
+
+def cmd_calibrate(args):
+    if args.template:
+        if not _validate_config():
+            return 1
+        import screen
+        _report_startup("calibrate --template")
+        screen.TEST_TEMPLATE_FILENAME = args.template
+        screen.run_test()
+        return 0
+
+    import pyautogui
+    _report_startup("calibrate")
+    print("Move your mouse to the desired top-left and bottom-right points... (Ctrl+C to stop)")
+    try:
+        while True:
+            x, y = pyautogui.position()
+            print(f"X: {x}, Y: {y}    ", end='\r')
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        print()
+    return 0
+
+
+def cmd_export(args):
+    if args.kind == "trace":
+        from subway_ai.tracing.analytics import export_recorded_states
+        from subway_ai.tracing.trace_store import open_trace
+        _report_startup("export trace")
+        output = args.output or args.source.rstrip("/\\") + "_states.npz"
+        export_recorded_states(open_trace(args.source), output)
+        print(f"Recorded episodes written to {output} (use with: evaluate --recorded {output})")
+        return 0
+
+    import torch
+    from stable_baselines3 import PPO
+    _report_startup("export policy")
+    model = PPO.load(args.source, device="cpu")
+    output = args.output or os.path.splitext(args.source)[0] + "_policy.pth"
+    torch.save(model.policy.state_dict(), output)
+    print(f"Policy weights written to {output}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Subway Surfers RL agent tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("train", help="Train the PPO agent on the live game.")
+    p.set_defaults(func=cmd_train)
+
+    p = sub.add_parser("evaluate", help="Rank checkpoints offline, or play one model live with --live.")
+    p.add_argument("--live", action="store_true", help="Play EVAL_MODEL_NAME against the live game.")
+    p.add_argument("--model-dir", help="Directory of checkpoints to rank (default: MODEL_DIR).")
+    p.add_argument("--episodes", type=int, help="Simulated episodes per checkpoint.")
+    p.add_argument("--workers", type=int, help="Worker processes.")
+    p.add_argument("--recorded", help="Recorded episodes (.npz) to replay instead of random ones.")
+    p.add_argument("--rules", choices=["dodge", "subway_env", "subway_env_coins"],
+                   help="Simulator rules (default: SIM_RULES).")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("pipeline", help="Play one model live with capture, detection and policy in separate processes.")
+    p.add_argument("--model", help="Model .zip to play (default: MODEL_DIR/EVAL_MODEL_NAME).")
+    p.add_argument("--workers", type=int, help="Detection processes (default: PIPELINE_DETECT_WORKERS).")
+    p.add_argument("--split", choices=["templates", "tiles"], help="How detection is divided (default: PIPELINE_SPLIT).")
+    p.add_argument("--duration", type=float, help="Seconds to run (default: until Ctrl+C).")
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser("bench", help="Benchmark detection, coin detection or command cold-start time.")
+    p.add_argument("target", nargs="?", choices=["detect", "coins", "startup"], default="detect")
+    p.add_argument("--frames", default=os.path.join(_ROOT, "dataset"), help="Directory of frames (detect).")
+    p.add_argument("--labels", default=None, help="Labelled coin frames (coins; default: COIN_LABELS_FILE).")
+    p.add_argument("--limit", type=int, default=200, help="Max frames to use (detect).")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per command (startup).")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("record", help="Save frames of GAME_REGION to RECORD_DIR.")
+    p.add_argument("--seconds", type=float, default=30.0)
+    p.add_argument("--fps", type=float, help="Frames per second (default: RECORD_FPS).")
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("calibrate", help="Show mouse coordinates, or live-test a template.")
+    p.add_argument("--template", help="Template file in assets/ to live-test (e.g. train.png).")
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser("export", help="Export a trace (as recorded episodes) or a policy (weights).")
+    p.add_argument("kind", choices=["trace", "policy"])
+    p.add_argument("source", help="Trace run directory, or model .zip.")
+    p.add_argument("-o", "--output", help="Output path.")
+    p.set_defaults(func=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
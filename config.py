@@ -1,6 +1,8 @@
 # config.py
 import os
 
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))  # Asset paths are resolved against the repo, not the working directory
+
 # --- Screen Capture ---
 GAME_REGION = {
     "left": 296,
@@ -10,7 +12,7 @@ GAME_REGION = {
 }
 
 # --- Detection ---
-TEMPLATE_DIR = "assets"
+TEMPLATE_DIR = os.path.join(ROOT_DIR, "assets")
 TEMPLATE_MATCH_THRESHOLD = 0.75
 CRITICAL_MATCH_THRESHOLD = 0.80
 DANGER_ZONE_Y_START = 0.40
@@ -23,6 +25,20 @@ OBSTACLE_TYPES = {
     "train": 3,
     "coin": 4,
 }
+# Coins: "color" = HSV threshold + connected components on the colour frame
+# (detection/coin_detector.py), "template" = grayscale matchTemplate with coin.png
+COIN_DETECTION = "color"
+COIN_HSV_LOWER = (14, 180, 170)  # OpenCV HSV (H 0-179): saturated yellow/orange, incl. the darker rim
+COIN_HSV_UPPER = (32, 255, 255)
+COIN_MIN_AREA_FRAC = 0.0004  # Min blob area, as a fraction of the frame area
+COIN_MAX_WIDTH_FRAC = 0.20  # Max blob width, as a fraction of the frame width (near coins are ~0.16)
+# Coin centres must lie in this polygon of (x, y) frame fractions; it cuts off the bottom corners (scenery)
+COIN_TRACK_AREA = ((0.0, 0.40), (1.0, 0.40), (1.0, 0.70), (0.88, 1.0), (0.12, 1.0), (0.0, 0.70))
+COIN_RUNNER_BOX = (0.30, 0.80, 0.70, 1.00)  # (x0, y0, x1, y1) frame fractions; no coins are reported in it
+COIN_COLLECT_Y_START = 0.65  # Coins between this and the runner box (within its x range) are about to be collected
+COIN_LABELS_FILE = os.path.join(ROOT_DIR, "dataset", "coin_labels.json")  # Hand-labelled coins: "tuning" frames (thresholds calibrated on) and "held_out" frames (benchmark)
+COIN_TEMPLATE_FILE = "coin.png.jpg"  # Only used by `cli.py bench coins` for comparison
+
 NUM_OBSTACLE_TYPES = len(OBSTACLE_TYPES)
 LETHAL_OBSTACLES = [
     OBSTACLE_TYPES["train"],
@@ -35,6 +51,17 @@ NUM_ACTIONS = 5
 REWARD_SURVIVE = 0.1
 REWARD_COIN = 0.5
 REWARD_CRASH = -10.0
+ACTION_REPEAT = 1  # Env steps per policy action: the action, then no-ops (rewards are summed)
+ADAPTIVE_SKIP = False  # Keep no-op'ing without querying the policy while the state holds and is safe
+ADAPTIVE_SKIP_MAX = 4  # Max extra steps per policy action in adaptive mode
+ADAPTIVE_SKIP_DETECTION = False  # Also skip obstacle/coin matching on those steps while the danger zone looks unchanged
+ADAPTIVE_SKIP_DIFF_THRESHOLD = 6.0  # Mean abs. grayscale difference of the danger zone that forces detection on a skipped step
+
+# --- Step Tracing ---
+TRACE_ENABLED = True  # Record every env step to TRACE_DIR (see tracing/)
+TRACE_DIR = "traces"
+TRACE_BLOCK_SIZE = 4096  # Records buffered in memory before a block is appended to disk
+TRACE_CURVE_WINDOW = 50  # Episodes in the reward-curve moving average
 
 # --- Agent Training (PPO Example) ---
 MODEL_DIR = "models"
@@ -52,15 +79,86 @@ CLIP_RANGE = 0.2
 ENT_COEF = 0.01
 LEARNING_STARTS = 1000
 SAVE_FREQ = 20000
+CHECKPOINT_KEEP_LAST = 3  # Periodic checkpoints kept on disk (plus the best one)
+
+# --- Pipelined Live Runtime (capture / detection / policy processes) ---
+PIPELINE_DETECT_WORKERS = 2
+PIPELINE_SPLIT = "templates"  # "templates" (subset of templates per worker) or "tiles" (column tile per worker)
+PIPELINE_FRAME_SLOTS = 8  # Shared-memory frame slots in the capture ring
+PIPELINE_MAX_INFLIGHT = 2  # Frames being detected at once
+PIPELINE_CAPTURE_FPS = 60
+PIPELINE_REPORT_EVERY = 200  # Print latency stats every N actions
+PIPELINE_KEY_PAUSE = 0.0  # pyautogui.PAUSE in the policy process (key_controller default: 0.05 s)
+PIPELINE_KEY_POST_DELAY = 0.0  # Sleep after each key press in the policy process (key_controller default: 0.05 s)
 
 # --- Agent Evaluation ---
 EVAL_MODEL_NAME = "ppo_subway_template_final.zip"
 NUM_EVAL_EPISODES = 10
 
-# --- Ensure directories exist ---
-os.makedirs(MODEL_DIR, exist_ok=True)
-os.makedirs(LOG_DIR, exist_ok=True)
+# --- Offline Checkpoint Evaluation (simulated episodes) ---
+EVAL_SIM_EPISODES = 256  # Episodes per checkpoint, stepped together for batched inference
+EVAL_MAX_EPISODE_STEPS = 2000
+EVAL_WORKERS = None  # Worker processes (None = one per core, capped at number of checkpoints)
+LEADERBOARD_FILENAME = "leaderboard.csv"
+SIM_HORIZON = 6  # Steps between an object entering the danger zone and reaching the player
+SIM_RULES = "dodge"  # "dodge" (game rules), "subway_env" (SubwayEnv rewards) or "subway_env_coins" (SubwayEnv rewards minus lethal spawns)
+SIM_SPAWN_PROBS = {
+    "clear": 0.70,
+    "coin": 0.15,
+    "train": 0.07,
+    "barrier_low": 0.04,
+    "barrier_high": 0.04,
+}
+
+# --- Recording ---
+RECORD_DIR = "recordings"
+RECORD_FPS = 10
+
+# Importing this module must stay cheap and free of side effects (it is imported
+# by every subprocess env and CLI command). Directory creation and validation
+# happen on demand, in the commands that need them.
+
+# --- Directories (created on demand) ---
+def ensure_dirs(*dirs):
+    """Creates the given directories (default: MODEL_DIR and LOG_DIR) if missing."""
+    for directory in dirs or (MODEL_DIR, LOG_DIR):
+        os.makedirs(directory, exist_ok=True)
+
+# --- Validation (lazy, runs once) ---
+_validated = False
 
-# --- Validation (Basic) ---
-if GAME_REGION is None:
-    raise ValueError("CRITICAL: `GAME_REGION` is not set in config.py. Please define the screen coordinates.")
\ No newline at end of file
+def validate(require_region=True):
+    """
+    Checks the settings above and raises ValueError with a readable message on
+    the first problem. Results are cached, so calling it repeatedly is free.
+    """
+    global _validated
+    if _validated:
+        return
+    if require_region:
+        if GAME_REGION is None:
+            raise ValueError("CRITICAL: `GAME_REGION` is not set in config.py. Please define the screen coordinates.")
+        missing = {"left", "top", "width", "height"} - set(GAME_REGION)
+        if missing:
+            raise ValueError(f"`GAME_REGION` is missing keys: {sorted(missing)}")
+        if GAME_REGION["width"] <= 0 or GAME_REGION["height"] <= 0:
+            raise ValueError(f"`GAME_REGION` must have a positive width and height, got {GAME_REGION}")
+    for name in ("TEMPLATE_MATCH_THRESHOLD", "CRITICAL_MATCH_THRESHOLD"):
+        if not 0.0 < globals()[name] <= 1.0:
+            raise ValueError(f"`{name}` must be in (0, 1], got {globals()[name]}")
+    if not 0.0 <= DANGER_ZONE_Y_START < DANGER_ZONE_Y_END <= 1.0:
+        raise ValueError("`DANGER_ZONE_Y_START` must be below `DANGER_ZONE_Y_END`, both within [0, 1].")
+    unknown = set(SIM_SPAWN_PROBS) - set(OBSTACLE_TYPES)
+    if unknown:
+        raise ValueError(f"`SIM_SPAWN_PROBS` has types not in OBSTACLE_TYPES: {sorted(unknown)}")
+    if PIPELINE_SPLIT not in ("templates", "tiles"):
+        raise ValueError(f"`PIPELINE_SPLIT` must be 'templates' or 'tiles', got '{PIPELINE_SPLIT}'")
+    if COIN_DETECTION not in ("color", "template"):
+        raise ValueError(f"`COIN_DETECTION` must be 'color' or 'template', got '{COIN_DETECTION}'")
+    if not 0.0 <= COIN_COLLECT_Y_START < COIN_RUNNER_BOX[1] <= 1.0:
+        raise ValueError("`COIN_COLLECT_Y_START` must be above the top of `COIN_RUNNER_BOX`, both within [0, 1].")
+    if SIM_RULES not in ("dodge", "subway_env", "subway_env_coins"):
+        raise ValueError(f"`SIM_RULES` must be 'dodge', 'subway_env' or 'subway_env_coins', got '{SIM_RULES}'")
+    if ACTION_REPEAT < 1:
+        raise ValueError(f"`ACTION_REPEAT` must be >= 1, got {ACTION_REPEAT}")
+    _validated = require_region
@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+import config # Import config
+from .state_extractor import classify_lane
+
+def detect_coins(frame, screen_width=None):
+    """
+    Finds coins with a colour threshold instead of template matching.
+
+    Coins are solid, saturated yellow/orange discs, so an HSV `inRange` (closed
+    with a 3x3 kernel to bridge the darker rim) plus one connected-components
+    pass is enough - and much cheaper than a full-frame `matchTemplate`. Only
+    rows from the top of the danger zone down are processed. Blobs are kept if
+    their size and shape fit a coin (near coins are ~100 px wide on 640 px
+    frames; spinning coins are taller than wide, stripes are flatter), their
+    centre lies in the track area (`COIN_TRACK_AREA`) and outside the runner's
+    box (`COIN_RUNNER_BOX`), which holds the runner's own yellow/orange shoes,
+    items and jetpack flames. Each kept blob is one coin. Thresholds were
+    calibrated on the "tuning" frames in `COIN_LABELS_FILE`.
+
+    Args:
+        frame (numpy.ndarray): BGRA (straight from the capture) or BGR game screen.
+        screen_width (int): Width used for lane classification (defaults to frame width).
+
+    Returns:
+        dict: {
+            "boxes": (N, 4) int array of coin boxes (x, y, w, h) in full-frame pixels,
+            "centers": (N, 2) int array of coin centres (x, y) in full-frame pixels,
+            "lane_counts": coins per lane inside the danger zone,
+            "lane_closest_y": per-lane bottom edge of the closest coin in the
+                              danger zone (frame height + 1 if none),
+            "approaching": coins in the collect band right in front of the runner
+                           (from `COIN_COLLECT_Y_START` down to the runner's box),
+        }
+    """
+    screen_height, width = frame.shape[:2]
+    screen_width = screen_width or width
+    y_start = int(screen_height * config.DANGER_ZONE_Y_START)
+    danger_zone_y_pixel_end = int(screen_height * config.DANGER_ZONE_Y_END)
+    collect_y_pixel_start = int(screen_height * config.COIN_COLLECT_Y_START)
+    runner_x0, runner_y0, runner_x1, _ = config.COIN_RUNNER_BOX
+    runner_x0, runner_x1 = runner_x0 * width, runner_x1 * width
+    runner_y0 = runner_y0 * screen_height
+
+    region = frame[y_start:]
+    conversion = cv2.COLOR_BGRA2BGR if region.shape[2] == 4 else None
+    region_bgr = cv2.cvtColor(region, conversion) if conversion is not None else region
+    hsv = cv2.cvtColor(region_bgr, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array(config.COIN_HSV_LOWER), np.array(config.COIN_HSV_UPPER))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+
+    n_labels, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    stats, centroids = stats[1:], centroids[1:] # Label 0 is the background
+    centroids = centroids + (0, y_start)
+
+    area = stats[:, cv2.CC_STAT_AREA]
+    w = stats[:, cv2.CC_STAT_WIDTH]
+    h = stats[:, cv2.CC_STAT_HEIGHT]
+    x_center, y_center = centroids[:, 0], centroids[:, 1]
+    track_area = (np.array(config.COIN_TRACK_AREA) * (width, screen_height)).astype(np.float32)
+    in_track = np.array([cv2.pointPolygonTest(track_area, (float(x), float(y)), False) >= 0
+                         for x, y in centroids], dtype=bool)
+    on_runner = (x_center >= runner_x0) & (x_center < runner_x1) & (y_center >= runner_y0)
+    keep = ((area >= config.COIN_MIN_AREA_FRAC * screen_height * width)
+            & (w <= config.COIN_MAX_WIDTH_FRAC * width)
+            & (h >= 0.6 * w) # Coins are round or (spinning) taller than wide, never flat stripes
+            & (area >= 0.5 * w * h) # ...and solid, unlike yellow decals and sparks
+            & in_track & ~on_runner)
+
+    boxes = stats[keep, :4].astype(np.int64)
+    boxes[:, 1] += y_start
+    centers = np.round(centroids[keep]).astype(np.int64).reshape(-1, 2)
+    bottoms = boxes[:, 1] + boxes[:, 3]
+
+    lane_counts = np.zeros(3, dtype=np.int64)
+    lane_closest_y = np.full(3, screen_height + 1, dtype=np.int64)
+    approaching = 0
+    for (x_center, y_center), bottom in zip(centers, bottoms):
+        lane_index = classify_lane(x_center, screen_width)
+        if bottom <= danger_zone_y_pixel_end:
+            lane_counts[lane_index] += 1
+            # Same proximity rule as obstacles: smaller y = closer
+            lane_closest_y[lane_index] = min(lane_closest_y[lane_index], bottom)
+        if y_center >= collect_y_pixel_start and runner_x0 <= x_center < runner_x1:
+            approaching += 1
+
+    return {
+        "boxes": boxes,
+        "centers": centers,
+        "lane_counts": lane_counts,
+        "lane_closest_y": lane_closest_y,
+        "approaching": approaching,
+    }
+
+def coin_lane_objects(coins):
+    """
+    Converts `detect_coins` output into a (types, y_bottoms) partial that
+    `merge_lane_objects` can combine with obstacle detections.
+    """
+    has_coin = coins["lane_counts"] > 0
+    types = np.where(has_coin, config.OBSTACLE_TYPES["coin"], config.OBSTACLE_TYPES["clear"]).astype(np.int32)
+    return types, coins["lane_closest_y"]
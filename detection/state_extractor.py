@@ -9,33 +9,33 @@ def classify_lane(x_center, screen_width):
     elif x_center < 2 * lane_width: return 1 # Middle
     else: return 2   # Right
 
-def extract_state(screen_gray, object_templates):
+def closest_objects_per_lane(screen_gray, object_templates, x_offset=0, screen_width=None, keep_x_range=None):
     """
-    Extracts state: the type of the *closest* detected object in the
-    danger zone for each lane.
+    Finds the type and bottom edge of the *closest* detected object in the
+    danger zone for each lane. Objects from `LETHAL_OBSTACLES` take precedence:
+    a coin closer than a train still leaves the lane marked as 'train'.
 
     Args:
-        screen_gray (numpy.ndarray): Grayscale game screen.
+        screen_gray (numpy.ndarray): Grayscale game screen (or a column tile of it).
         object_templates (dict): Templates for game objects (trains, barriers, coins).
+        x_offset (int): X position of `screen_gray` within the full screen (for tiles).
+        screen_width (int): Full screen width used for lane classification
+                            (defaults to the width of `screen_gray`).
+        keep_x_range (tuple): Optional (x_start, x_end) in full-screen pixels; matches
+                              whose center falls outside are ignored (tile ownership).
 
     Returns:
-        numpy.ndarray: State vector [lane0_type, lane1_type, lane2_type]
-                       using type IDs from config.OBSTACLE_TYPES.
-                       Returns None if screen is invalid.
+        tuple: (types, y_bottoms) int arrays of length 3. Lanes without an object
+               are 'clear' with y_bottom = screen height + 1.
     """
-    if screen_gray is None: return None
-
-    screen_height, screen_width = screen_gray.shape
+    screen_height = screen_gray.shape[0]
+    screen_width = screen_width or screen_gray.shape[1]
     danger_zone_y_pixel_start = int(screen_height * config.DANGER_ZONE_Y_START)
     danger_zone_y_pixel_end = int(screen_height * config.DANGER_ZONE_Y_END)
 
-    # State: [closest_type_lane0, closest_type_lane1, closest_type_lane2]
     # Initialize with 'clear' type and max y-distance (bottom of screen)
-    lane_closest_obstacle = [
-        {"type": config.OBSTACLE_TYPES["clear"], "y_bottom": screen_height + 1},
-        {"type": config.OBSTACLE_TYPES["clear"], "y_bottom": screen_height + 1},
-        {"type": config.OBSTACLE_TYPES["clear"], "y_bottom": screen_height + 1}
-    ]
+    types = np.full(3, config.OBSTACLE_TYPES["clear"], dtype=np.int32)
+    y_bottoms = np.full(3, screen_height + 1, dtype=np.int64)
 
     # Iterate through object templates provided
     for template_name, template_img in object_templates.items():
@@ -52,18 +52,60 @@ def extract_state(screen_gray, object_templates):
 
             # Check if the *bottom* of the obstacle is within the vertical danger zone
             if danger_zone_y_pixel_start <= match_bottom_y <= danger_zone_y_pixel_end:
-                x_center = x + w / 2
+                x_center = x_offset + x + w / 2
+                if keep_x_range is not None and not (keep_x_range[0] <= x_center < keep_x_range[1]):
+                    continue
                 lane_index = classify_lane(x_center, screen_width)
 
                 # If this obstacle is closer (higher on screen = smaller y) than
                 # the current closest one in this lane, update the state for that lane.
-                if match_bottom_y < lane_closest_obstacle[lane_index]["y_bottom"]:
-                    lane_closest_obstacle[lane_index]["type"] = obstacle_type_id
-                    lane_closest_obstacle[lane_index]["y_bottom"] = match_bottom_y
-                    # Debug: print(f"  Update Lane {lane_index}: {template_name} at y={match_bottom_y}")
+                # A lethal obstacle always replaces a non-lethal one, never the reverse.
+                is_lethal = obstacle_type_id in config.LETHAL_OBSTACLES
+                lane_lethal = types[lane_index] in config.LETHAL_OBSTACLES
+                if (is_lethal and not lane_lethal) or (is_lethal == lane_lethal and match_bottom_y < y_bottoms[lane_index]):
+                    types[lane_index] = obstacle_type_id
+                    y_bottoms[lane_index] = match_bottom_y
+
+    return types, y_bottoms
+
+def merge_lane_objects(partials):
+    """
+    Merges per-lane results from several `closest_objects_per_lane` calls (e.g. run
+    on disjoint template subsets or tiles) or `coin_lane_objects` into one state
+    vector. As in `closest_objects_per_lane`, the closest lethal obstacle wins
+    over any closer coin, so coins never hide a lethal obstacle.
+
+    Args:
+        partials (list): (types, y_bottoms) tuples.
+
+    Returns:
+        numpy.ndarray: State vector [lane0_type, lane1_type, lane2_type].
+    """
+    types = np.stack([p[0] for p in partials])
+    y_bottoms = np.stack([p[1] for p in partials])
+    lethal = np.isin(types, config.LETHAL_OBSTACLES)
+    # Lanes holding a lethal obstacle only compare lethal obstacles
+    candidates = lethal | ~lethal.any(axis=0)
+    closest = np.argmin(np.where(candidates, y_bottoms, np.iinfo(np.int64).max), axis=0)
+    return types[closest, np.arange(3)].astype(np.int32)
+
+def extract_state(screen_gray, object_templates):
+    """
+    Extracts state: the type of the *closest* detected object in the
+    danger zone for each lane.
+
+    Args:
+        screen_gray (numpy.ndarray): Grayscale game screen.
+        object_templates (dict): Templates for game objects (trains, barriers, coins).
 
+    Returns:
+        numpy.ndarray: State vector [lane0_type, lane1_type, lane2_type]
+                       using type IDs from config.OBSTACLE_TYPES.
+                       Returns None if screen is invalid.
+    """
+    if screen_gray is None: return None
 
     # Final state is the array of types of the closest obstacles found
-    state_vector = np.array([lane["type"] for lane in lane_closest_obstacle], dtype=np.int32)
+    state_vector, _ = closest_objects_per_lane(screen_gray, object_templates)
     # print(f"Extracted State: {state_vector}") # Debug
-    return state_vector
\ No newline at end of file
+    return state_vector
@@ -0,0 +1,202 @@
+# env/simulator.py
+import numpy as np
+import subway_ai.config as config
+
+# Action indices (see utils/key_controller.ACTION_MAP)
+ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_ROLL, ACTION_NOOP = 0, 1, 2, 3, 4
+
+CLEAR = config.OBSTACLE_TYPES["clear"]
+COIN = config.OBSTACLE_TYPES["coin"]
+TRAIN = config.OBSTACLE_TYPES["train"]
+BARRIER_LOW = config.OBSTACLE_TYPES["barrier_low"]
+BARRIER_HIGH = config.OBSTACLE_TYPES["barrier_high"]
+
+SIM_RULE_SETS = ("dodge", "subway_env", "subway_env_coins")
+
+
+def random_lane_rows(rng, n_rows, n_episodes, spawn_probs=None):
+    """
+    Draws random lane rows (what scrolls into the danger zone each step).
+
+    Returns:
+        numpy.ndarray: (n_episodes, n_rows, 3) array of obstacle type IDs.
+    """
+    spawn_probs = spawn_probs or config.SIM_SPAWN_PROBS
+    types = np.array([config.OBSTACLE_TYPES[name] for name in spawn_probs], dtype=np.int32)
+    probs = np.array(list(spawn_probs.values()), dtype=np.float64)
+    rows = rng.choice(types, size=(n_episodes, n_rows, 3), p=probs / probs.sum())
+    # Never block all three lanes with trains: that row would be unwinnable
+    all_trains = (rows == TRAIN).all(axis=2)
+    rows[all_trains, rng.integers(0, 3)] = CLEAR
+    return rows
+
+
+def observations_to_rows(states):
+    """
+    Converts recorded observations into spawn rows.
+
+    A recorded state is the nearest object per lane *while it approaches*, so one
+    train shows up in several consecutive observations. Only the step where a
+    lane's observed type changes to a non-clear type becomes a spawn; the
+    following identical observations are the same object still approaching.
+    (Two identical objects back to back therefore replay as one.)
+
+    Returns:
+        numpy.ndarray: (steps, 3) int32 spawn rows.
+    """
+    states = np.asarray(states, dtype=np.int32)
+    previous = np.vstack([np.full((1, 3), CLEAR, dtype=np.int32), states[:-1]])
+    new_object = (states != previous) & (states != CLEAR)
+    return np.where(new_object, states, CLEAR).astype(np.int32)
+
+
+def load_recorded_rows(path):
+    """
+    Loads recorded lane states (e.g. from `SubwayEnv` traces) as spawn-row streams.
+
+    The file is an `.npz` with a `states` array of shape (steps, 3), optionally
+    with `episode_starts` (indices where recorded episodes begin). Each recorded
+    episode becomes one simulated episode; its observations are de-duplicated
+    into spawns with `observations_to_rows`.
+
+    Returns:
+        list: One (steps, 3) int32 array per recorded episode.
+    """
+    with np.load(path) as data:
+        states = np.asarray(data["states"], dtype=np.int32)
+        starts = np.asarray(data["episode_starts"]) if "episode_starts" in data else np.array([0])
+    return [observations_to_rows(ep) for ep in np.split(states, starts[1:]) if len(ep) > 0]
+
+
+class VectorSubwaySim:
+    """
+    Vectorized, headless approximation of the live game for offline evaluation.
+
+    Each episode keeps a (horizon, 3) grid of upcoming objects per lane, row 0
+    being the one reaching the player this step. The observation matches
+    `SubwayEnv`: the type of the nearest upcoming object in each lane.
+
+    Three reward/termination rule sets are available (`rules`, default `SIM_RULES`):
+
+    - "dodge": the game's own rules. Trains must be dodged by changing lanes,
+      low barriers by jumping, high barriers by rolling; coins reaching the
+      player's lane pay `REWARD_COIN`. This is NOT what `SubwayEnv` rewards,
+      so leaderboard rewards are not comparable with `evaluate --live`.
+    - "subway_env": mirrors `SubwayEnv._finish_step`. The episode ends with
+      `REWARD_CRASH` as soon as any lane holds one of `LETHAL_OBSTACLES`, and
+      coins pay as in `SubwayEnv` (per collected coin with colour coin
+      detection, per coin lane otherwise). Comparable with live rewards, but
+      since lethal spawns end the episode whatever the agent does, it barely
+      separates checkpoints.
+    - "subway_env_coins": `SubwayEnv`'s rewards on the stretches between
+      lethal observations. Lethal spawns are dropped (under `SubwayEnv` they
+      end the episode whatever the agent does), so episodes run to
+      `max_steps` and the score only depends on the coins the agent's lane
+      choices collect. Ranks checkpoints by what they can still influence
+      under `SubwayEnv`; absolute rewards are not comparable with live ones.
+
+    Under both "subway_env" rule sets coins are, like in `SubwayEnv`, not paid
+    on steps where the agent changed lanes (colour coin detection).
+
+    All episodes are stepped together so policy inference can be batched.
+    """
+
+    def __init__(self, n_episodes, horizon=None, max_steps=None, lane_rows=None, seed=None, rules=None):
+        """
+        Args:
+            n_episodes (int): Number of episodes simulated in parallel.
+            horizon (int): Rows of look-ahead (danger zone depth in steps).
+            max_steps (int): Truncate episodes after this many steps.
+            lane_rows (list): Optional recorded lane-row streams (one per episode).
+                              A recorded episode is truncated when its stream runs out.
+            seed (int): RNG seed.
+            rules (str): One of `SIM_RULE_SETS` (see class docstring).
+        """
+        self.rules = rules or config.SIM_RULES
+        if self.rules not in SIM_RULE_SETS:
+            raise ValueError(f"Unknown simulator rules '{self.rules}'. Use one of {', '.join(SIM_RULE_SETS)}.")
+        self.n_episodes = n_episodes
+        self.horizon = horizon or config.SIM_HORIZON
+        self.max_steps = max_steps or config.EVAL_MAX_EPISODE_STEPS
+        self.rng = np.random.default_rng(seed)
+        self.lane_rows = lane_rows
+        self.step_limits = np.full(n_episodes, self.max_steps, dtype=np.int64)
+        if lane_rows is not None:
+            if len(lane_rows) != n_episodes:
+                raise ValueError(f"Got {len(lane_rows)} recorded streams for {n_episodes} episodes.")
+            self.step_limits = np.minimum(self.step_limits, [len(stream) for stream in lane_rows])
+
+    def _next_rows(self):
+        rows = random_lane_rows(self.rng, 1, self.n_episodes)[:, 0, :]
+        if self.lane_rows is not None:
+            # A recorded spawn at step t enters the far end of the danger zone at step t
+            for i, stream in enumerate(self.lane_rows):
+                idx = self.steps[i]
+                rows[i] = stream[idx] if idx < len(stream) else CLEAR
+        return self._filter_spawns(rows)
+
+    def _filter_spawns(self, rows):
+        """Drops lethal spawns under "subway_env_coins" (see class docstring)."""
+        if self.rules == "subway_env_coins":
+            rows = np.where(np.isin(rows, config.LETHAL_OBSTACLES), CLEAR, rows)
+        return rows
+
+    def _observe(self):
+        occupied = self.grid != CLEAR
+        nearest = np.where(occupied.any(axis=1), occupied.argmax(axis=1), 0)
+        return np.take_along_axis(self.grid, nearest[:, None, :], axis=1)[:, 0, :].astype(np.int32)
+
+    def reset(self):
+        """Starts all episodes. Returns the (n_episodes, 3) observation batch."""
+        self.steps = np.zeros(self.n_episodes, dtype=np.int64)
+        self.player_lane = np.ones(self.n_episodes, dtype=np.int64)
+        self.done = np.zeros(self.n_episodes, dtype=bool)
+        self.episode_rewards = np.zeros(self.n_episodes, dtype=np.float64)
+
+        self.grid = random_lane_rows(self.rng, self.horizon, self.n_episodes)
+        self.grid[:, :2, :] = CLEAR # Give the agent a clear start
+        if self.lane_rows is not None:
+            for i, stream in enumerate(self.lane_rows):
+                self.grid[i] = CLEAR
+                self.grid[i, -1] = stream[0]
+        self.grid = self._filter_spawns(self.grid)
+        return self._observe()
+
+    def step(self, actions):
+        """
+        Advances every still-running episode by one step.
+
+        Args:
+            actions (numpy.ndarray): (n_episodes,) action indices. Ignored for finished episodes.
+
+        Returns:
+            tuple: (obs, rewards, done) batches; `done` is cumulative.
+        """
+        active = ~self.done
+        actions = np.asarray(actions)
+
+        previous_lane = self.player_lane
+        self.player_lane = np.clip(self.player_lane - (actions == ACTION_LEFT) + (actions == ACTION_RIGHT), 0, 2)
+        hit = self.grid[np.arange(self.n_episodes), 0, self.player_lane]
+
+        self.steps += active
+        self.grid = np.concatenate([self.grid[:, 1:, :], self._next_rows()[:, None, :]], axis=1)
+        obs = self._observe()
+
+        if self.rules == "dodge":
+            crashed = ((hit == TRAIN)
+                       | ((hit == BARRIER_LOW) & (actions != ACTION_JUMP))
+                       | ((hit == BARRIER_HIGH) & (actions != ACTION_ROLL)))
+            coins = hit == COIN
+        else: # "subway_env*": judged on the observation after the action, like SubwayEnv.step
+            crashed = np.isin(obs, config.LETHAL_OBSTACLES).any(axis=1) # Never true for "subway_env_coins"
+            if config.COIN_DETECTION == "color":
+                coins = (hit == COIN) & (self.player_lane == previous_lane)
+            else:
+                coins = (obs == COIN).sum(axis=1)
+        rewards = np.where(crashed, config.REWARD_CRASH, config.REWARD_SURVIVE + coins * config.REWARD_COIN)
+        rewards = np.where(active, rewards, 0.0)
+
+        self.episode_rewards += rewards
+        self.done |= active & (crashed | (self.steps >= self.step_limits))
+        return obs, rewards, self.done.copy()
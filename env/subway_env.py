@@ -2,8 +2,9 @@
 import gymnasium as gym
 import numpy as np
 import time
-from subway_ai.game_capture.screen_capture import capture_screen
-from subway_ai.detection.state_extractor import extract_state
+from subway_ai.game_capture.screen_capture import capture_screen, capture_frame, to_grayscale
+from subway_ai.detection.state_extractor import extract_state, closest_objects_per_lane, merge_lane_objects
+from subway_ai.detection.coin_detector import detect_coins, coin_lane_objects
 from subway_ai.detection.template_matcher import load_templates, match_template
 from subway_ai.utils.key_controller import perform_action, press_start_key
 import subway_ai.config as config
@@ -15,7 +16,19 @@ class SubwayEnv(gym.Env):
         self.observation_space = gym.spaces.MultiDiscrete([config.NUM_OBSTACLE_TYPES] * 3)
         self.render_mode = render_mode
         self.templates = load_templates()
+        self.color_coins = config.COIN_DETECTION == "color"
+        # With colour coin detection the coin template is not matched at all
+        self.object_templates = ({k: v for k, v in self.templates.items() if k != "coin"}
+                                 if self.color_coins else self.templates)
         self.last_screen_raw_gray = None
+        self.changed_lane = False # Last action was left/right, for coin collection
+        self.last_coins_approaching = 0 # Coins in front of the runner at the last detection
+        self.stable_coins_approaching = None # Same, once seen on two detections in a row (None = not yet)
+        self.last_coins_collected = 0
+        self.last_state = np.zeros(3, dtype=np.int32)
+        self.last_detected_zone = None # Danger-zone thumbnail of the last detected frame
+        self.last_capture_ms = 0.0 # Timings of the most recent step, for tracing
+        self.last_detect_ms = 0.0
         self.episode_count = 0
 
     def _check_template(self, template_name, threshold=None):
@@ -26,11 +39,65 @@ class SubwayEnv(gym.Env):
         matches = match_template(self.last_screen_raw_gray, template, threshold=threshold)
         return len(matches) > 0
 
+    def _capture(self):
+        """
+        Grabs one screen into `last_screen_raw_gray`. With colour coin detection the
+        BGRA frame is returned too (one grab shared by template matching and coin
+        detection), otherwise None.
+        """
+        start = time.perf_counter()
+        frame = None
+        if self.color_coins:
+            frame = capture_frame()
+            self.last_screen_raw_gray = to_grayscale(frame) if frame is not None else None
+        else:
+            self.last_screen_raw_gray = capture_screen(grayscale=True)
+        self.last_capture_ms = (time.perf_counter() - start) * 1000.0
+        self.last_detect_ms = 0.0
+        return frame
+
+    def _danger_zone_thumbnail(self, screen_gray):
+        """Subsampled danger-zone crop, used to notice scene changes on skipped detections."""
+        screen_height = screen_gray.shape[0]
+        y_start = int(screen_height * config.DANGER_ZONE_Y_START)
+        y_end = int(screen_height * config.DANGER_ZONE_Y_END)
+        return screen_gray[y_start:y_end:4, ::4].astype(np.int16)
+
+    def _detect(self, frame):
+        """Runs obstacle (and colour coin) detection on the last captured screen."""
+        start = time.perf_counter()
+        self.last_coins_collected = 0
+        if not self.color_coins:
+            state = extract_state(self.last_screen_raw_gray, self.templates)
+        else:
+            obstacles = closest_objects_per_lane(self.last_screen_raw_gray, self.object_templates)
+            coins = detect_coins(frame)
+            # A coin is collected when it leaves the collect band into the runner's box, so
+            # each one is paid once, on the drop. The drop only counts once the lower count
+            # is seen on two detections in a row: a coin the detector misses for a single
+            # frame is not paid. Lane changes move coins out of the band, so they start over.
+            approaching = coins["approaching"]
+            if self.changed_lane:
+                self.stable_coins_approaching = None
+            elif approaching == self.last_coins_approaching:
+                if self.stable_coins_approaching is not None:
+                    self.last_coins_collected = max(0, self.stable_coins_approaching - approaching)
+                self.stable_coins_approaching = approaching
+            self.last_coins_approaching = approaching
+            state = merge_lane_objects([obstacles, coin_lane_objects(coins)])
+        self.last_detected_zone = self._danger_zone_thumbnail(self.last_screen_raw_gray)
+        self.last_detect_ms = (time.perf_counter() - start) * 1000.0
+        return state
+
     def _get_state(self):
-        self.last_screen_raw_gray = capture_screen(grayscale=True)
+        frame = self._capture()
         if self.last_screen_raw_gray is None:
+            self.last_coins_collected = 0
             return None
-        return extract_state(self.last_screen_raw_gray, self.templates)
+        return self._detect(frame)
+
+    def _track_lane(self, action):
+        self.changed_lane = action in (0, 1) # Left / Right
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
@@ -55,21 +122,60 @@ class SubwayEnv(gym.Env):
         else:
             print("Warning: Could not confirm game start after max attempts.")
 
+        self.changed_lane = False
+        self.last_coins_approaching = 0
+        self.stable_coins_approaching = None
         state = self._get_state()
         if state is None:
             state = np.zeros(3, dtype=np.int32)
+        self.last_state = state
         return state, {}
 
     def step(self, action):
         perform_action(action)
+        self._track_lane(action)
         time.sleep(0.1)
         state = self._get_state()
+        return self._finish_step(state)
+
+    def step_without_detection(self, action):
+        """
+        Like `step`, but reuses the last state instead of running obstacle/coin
+        matching, as long as the danger zone still looks like it did at the last
+        detection (mean absolute difference of a subsampled crop at most
+        `ADAPTIVE_SKIP_DIFF_THRESHOLD`). If it changed, full detection runs after
+        all and `info["redetected"]` is set. The game-over check always runs.
+        Used by `AdaptiveFrameSkip` while the lane state is known to hold.
+        """
+        perform_action(action)
+        self._track_lane(action)
+        time.sleep(0.1)
+        frame = self._capture()
+        if self.last_screen_raw_gray is None:
+            self.last_coins_collected = 0
+            return self._finish_step(None)
+
+        zone = self._danger_zone_thumbnail(self.last_screen_raw_gray)
+        redetected = bool(self.last_detected_zone is None
+                      or zone.shape != self.last_detected_zone.shape
+                      or np.abs(zone - self.last_detected_zone).mean() > config.ADAPTIVE_SKIP_DIFF_THRESHOLD)
+        if redetected:
+            state = self._detect(frame)
+        else:
+            self.last_coins_collected = 0 # No coin detection on this step
+            state = self.last_state
+        state, reward, done, truncated, info = self._finish_step(state)
+        info["redetected"] = redetected
+        return state, reward, done, truncated, info
+
+    def _finish_step(self, state):
         if state is None:
             state = np.zeros(3, dtype=np.int32)
             reward = config.REWARD_CRASH
             done = True
             info = {"reason": "capture_failed"}
             return state, reward, done, False, info
+        self.last_state = state
 
         is_over = self._check_template('game_over', threshold=config.CRITICAL_MATCH_THRESHOLD)
         reward = config.REWARD_SURVIVE
@@ -81,8 +187,11 @@ class SubwayEnv(gym.Env):
             reward = config.REWARD_CRASH
             info["reason"] = "game_over"
         else:
+            if self.color_coins:
+                # Coins collected since the last detection, each counted once (see _detect)
+                reward += config.REWARD_COIN * self.last_coins_collected
             for i, obstacle_type in enumerate(state):
-                if obstacle_type == config.OBSTACLE_TYPES["coin"]:
+                if obstacle_type == config.OBSTACLE_TYPES["coin"] and not self.color_coins:
                     reward += config.REWARD_COIN
                 elif obstacle_type in config.LETHAL_OBSTACLES:
                     reward = config.REWARD_CRASH
@@ -0,0 +1,182 @@
+# env/wrappers.py
+import time
+import gymnasium as gym
+import numpy as np
+import subway_ai.config as config
+from subway_ai.tracing.trace_store import TraceWriter, new_run_dir
+
+NOOP_ACTION = 4 # See utils/key_controller.ACTION_MAP
+
+
+class AdaptiveFrameSkip(gym.Wrapper):
+    """
+    Action repeat with reward accumulation, plus an optional adaptive mode.
+
+    Every `step` holds the policy's action for `repeat` env steps (summing
+    rewards, stopping early when the episode ends). Each action is a single key
+    press, so it is sent on the first step only and the other `repeat - 1`
+    steps are no-ops; repeating a lane change would move several lanes and
+    repeating jump/roll would queue several. In adaptive mode the wrapper then
+    keeps stepping with no-op on its own - without querying the policy - while
+    the lane state is unchanged and holds no obstacle from `LETHAL_OBSTACLES`,
+    for at most `max_skip` extra steps. With `skip_detection=True` those extra
+    steps skip obstacle/coin matching while the danger zone looks unchanged
+    (a cheap frame diff, see `SubwayEnv.step_without_detection`); when it
+    changes, detection runs and the fresh state can end the skip.
+
+    Place it inside `Monitor` and outside `TraceRecorder` (if used), since
+    detection skipping calls `step_without_detection` on the wrapped env.
+
+    `info["skipped_steps"]` holds the extra steps taken in the current call;
+    totals are available from `skip_stats()`. Only the first env step of each
+    call is flagged as a policy step to an inner `TraceRecorder`.
+    """
+
+    def __init__(self, env, repeat=config.ACTION_REPEAT, adaptive=config.ADAPTIVE_SKIP,
+                 max_skip=config.ADAPTIVE_SKIP_MAX, skip_detection=config.ADAPTIVE_SKIP_DETECTION):
+        super().__init__(env)
+        if repeat < 1:
+            raise ValueError(f"repeat must be >= 1, got {repeat}")
+        self.repeat = repeat
+        self.adaptive = adaptive
+        self.max_skip = max_skip
+        # Prefer a wrapper's override (e.g. TraceRecorder) over the raw env method
+        self._step_without_detection = (getattr(env, "step_without_detection", None)
+                                         or getattr(env.unwrapped, "step_without_detection", None))
+        self.skip_detection = skip_detection and self._step_without_detection is not None
+        self._lethal = np.array(config.LETHAL_OBSTACLES)
+        self._last_obs = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.policy_steps = 0
+        self.env_steps = 0
+        self.skipped_steps = 0
+        self.detections_skipped = 0
+
+    def skip_stats(self):
+        """Returns counters since the last `reset_stats()`."""
+        return {
+            "policy_steps": self.policy_steps,
+            "env_steps": self.env_steps,
+            "skipped_steps": self.skipped_steps,
+            "detections_skipped": self.detections_skipped,
+            "skip_ratio": self.skipped_steps / self.env_steps if self.env_steps else 0.0,
+        }
+
+    def _is_safe_hold(self, obs):
+        """True if the state did not change and no lethal obstacle is in the danger zone."""
+        return (self._last_obs is not None
+                and np.array_equal(obs, self._last_obs)
+                and not np.isin(obs, self._lethal).any())
+
+    def _mark_policy_step(self, flag):
+        """Tells an inner `TraceRecorder` whether the next env step was chosen by the policy."""
+        if hasattr(self.env, "policy_step"):
+            self.env.policy_step = flag
+
+    def reset(self, **kwargs):
+        if self.env_steps:
+            stats = self.skip_stats()
+            print(f"Frame skip: {stats['skipped_steps']}/{stats['env_steps']} env steps without a policy query "
+                  f"({stats['skip_ratio']:.0%}), {stats['detections_skipped']} detections skipped")
+        obs, info = self.env.reset(**kwargs)
+        self._last_obs = obs
+        return obs, info
+
+    def step(self, action):
+        self.policy_steps += 1
+        total_reward = 0.0
+        terminated = truncated = False
+        for i in range(self.repeat):
+            self._mark_policy_step(i == 0)
+            obs, reward, terminated, truncated, info = self.env.step(action if i == 0 else NOOP_ACTION)
+            total_reward += reward
+            self.env_steps += 1
+            if terminated or truncated:
+                break
+
+        skipped = 0
+        if self.adaptive:
+            while not (terminated or truncated) and skipped < self.max_skip and self._is_safe_hold(obs):
+                self._mark_policy_step(False)
+                if self.skip_detection:
+                    obs, reward, terminated, truncated, info = self._step_without_detection(NOOP_ACTION)
+                    self.detections_skipped += not info.get("redetected", False)
+                else:
+                    obs, reward, terminated, truncated, info = self.env.step(NOOP_ACTION)
+                total_reward += reward
+                skipped += 1
+                self.env_steps += 1
+
+        self._mark_policy_step(True)
+        self.skipped_steps += skipped
+        self._last_obs = obs
+        info = dict(info, skipped_steps=skipped)
+        return obs, total_reward, terminated, truncated, info
+
+
+class TraceRecorder(gym.Wrapper):
+    """
+    Records every env step (state, action, reward, done reason, timings) into a
+    `TraceWriter` run directory. Wrap the raw `SubwayEnv` directly so skipped
+    frames from `AdaptiveFrameSkip` are recorded too; it clears `policy_step`
+    for the steps it takes on its own, and that flag is stored per record.
+
+    The buffered block is flushed at the end of each episode and on `close()`.
+    """
+
+    def __init__(self, env, tag="run", trace_dir=config.TRACE_DIR, block_size=config.TRACE_BLOCK_SIZE):
+        super().__init__(env)
+        self.run_dir = new_run_dir(tag, trace_dir)
+        self.writer = TraceWriter(self.run_dir, block_size=block_size)
+        self.total_steps = 0
+        self.episode = -1
+        self.policy_step = True # Set by AdaptiveFrameSkip
+        self._last_obs = np.zeros(3, dtype=np.int32)
+
+    def reset(self, **kwargs):
+        obs, info = self.env.reset(**kwargs)
+        self.episode += 1
+        self._last_obs = obs
+        return obs, info
+
+    def _record(self, step_fn, action):
+        start = time.perf_counter()
+        obs, reward, terminated, truncated, info = step_fn(action)
+        step_ms = (time.perf_counter() - start) * 1000.0
+
+        done_reason = info.get("reason", "")
+        if truncated and not done_reason:
+            done_reason = "truncated"
+        raw_env = self.env.unwrapped
+        self.writer.append(self.total_steps, self.episode, self._last_obs, action, reward,
+                           done_reason=done_reason if (terminated or truncated) else "",
+                           next_state=obs,
+                           step_ms=step_ms,
+                           capture_ms=getattr(raw_env, "last_capture_ms", 0.0),
+                           detect_ms=getattr(raw_env, "last_detect_ms", 0.0),
+                           policy_step=self.policy_step)
+        self.total_steps += 1
+        self._last_obs = obs
+        if terminated or truncated:
+            self.writer.flush()
+        return obs, reward, terminated, truncated, info
+
+    def step(self, action):
+        return self._record(self.env.step, action)
+
+    def step_without_detection(self, action):
+        return self._record(self.env.unwrapped.step_without_detection, action)
+
+    def close(self):
+        self.writer.close()
+        print(f"Trace ({self.writer.count} steps) saved to {self.run_dir}")
+        return self.env.close()
+
+
+def wrap_env(env, trace_tag=None):
+    """Applies the standard wrapper stack: AdaptiveFrameSkip(TraceRecorder(env)) (tracing if TRACE_ENABLED)."""
+    if config.TRACE_ENABLED and trace_tag:
+        env = TraceRecorder(env, tag=trace_tag)
+    return AdaptiveFrameSkip(env)
@@ -6,6 +6,36 @@ import config # Import config file
 # Use the region defined in the config file
 GAME_REGION = config.GAME_REGION
 
+def capture_frame():
+    """
+    Grabs the GAME_REGION once, without any colour conversion.
+
+    Use this when both grayscale (template matching) and colour (coin
+    detection) are needed: one grab, then `to_grayscale` / the colour
+    consumers share the same BGRA frame.
+
+    Returns:
+        numpy.ndarray: BGRA image straight from mss, or None if capture fails.
+    """
+    if GAME_REGION is None:
+        print("Error: GAME_REGION not set.")
+        return None
+
+    with mss.mss() as sct:
+        try:
+            return np.array(sct.grab(GAME_REGION))
+        except mss.ScreenShotError as e:
+            print(f"Error capturing screen: {e}")
+            print(f"Check if the GAME_REGION ({GAME_REGION}) is valid and visible.")
+            return None
+        except Exception as e:
+             print(f"An unexpected error occurred during screen capture: {e}")
+             return None
+
+def to_grayscale(frame_bgra):
+    """Converts a BGRA frame from `capture_frame` straight to grayscale (no BGR intermediate)."""
+    return cv2.cvtColor(frame_bgra, cv2.COLOR_BGRA2GRAY)
+
 def capture_screen(grayscale=True):
     """
     Captures the defined GAME_REGION of the screen.
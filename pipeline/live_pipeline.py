@@ -0,0 +1,293 @@
+# pipeline/live_pipeline.py
+import os
+import queue
+import sys
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+import subway_ai.config as config
+from subway_ai.pipeline.shared_frames import SharedFrameRing
+
+# The detection and key modules do a plain `import config`, so the repo dir must be
+# importable too. Every stage process imports this module first, so this covers all
+# of them, also under `python -m subway_ai.pipeline.live_pipeline`.
+if config.ROOT_DIR not in sys.path:
+    sys.path.insert(0, config.ROOT_DIR)
+
+# Each stage runs in its own process and imports its heavy dependencies itself,
+# so the capture process never loads torch and the policy process never loads mss.
+
+
+def _frame_shape():
+    return (config.GAME_REGION["height"], config.GAME_REGION["width"])
+
+
+def split_templates(templates, n_workers):
+    """
+    Splits obstacle templates across detection workers, balancing by template
+    area (matchTemplate cost grows with it).
+
+    Returns:
+        list: One template dict per worker (some may be empty if n_workers > templates).
+    """
+    obstacle_templates = {
+        name: img for name, img in templates.items()
+        if config.OBSTACLE_TYPES.get(name, config.OBSTACLE_TYPES["clear"]) != config.OBSTACLE_TYPES["clear"]
+    }
+    by_area = sorted(obstacle_templates.items(), key=lambda item: item[1].size, reverse=True)
+    return [dict(by_area[i::n_workers]) for i in range(n_workers)]
+
+
+def tile_columns(width, n_workers):
+    """Splits the screen width into `n_workers` contiguous (x_start, x_end) column ranges."""
+    edges = np.linspace(0, width, n_workers + 1).astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(n_workers)]
+
+
+def capture_stage(ring_name, n_slots, stop_event, target_fps):
+    """Grabs the game region as fast as `target_fps` allows and publishes grayscale frames."""
+    import cv2
+    import mss
+
+    ring = SharedFrameRing(_frame_shape(), n_slots, name=ring_name)
+    frame_interval = 1.0 / target_fps if target_fps else 0.0
+    seq = 0
+    try:
+        with mss.mss() as sct:
+            while not stop_event.is_set():
+                capture_time = time.perf_counter()
+                try:
+                    shot = sct.grab(config.GAME_REGION)
+                except mss.ScreenShotError as e:
+                    print(f"[capture] Error capturing screen: {e}")
+                    time.sleep(0.5)
+                    continue
+                # BGRA -> grayscale straight into the shared slot (no intermediate BGR copy)
+                cv2.cvtColor(np.asarray(shot), cv2.COLOR_BGRA2GRAY, dst=ring.begin_write(seq))
+                ring.end_write(seq, capture_time)
+                seq += 1
+
+                remaining = frame_interval - (time.perf_counter() - capture_time)
+                if remaining > 0:
+                    time.sleep(remaining)
+    finally:
+        ring.close()
+
+
+def detect_stage(worker_id, n_workers, split, ring_name, n_slots, job_queue, result_queue, stop_event):
+    """
+    Runs template matching for this worker's share of a frame.
+
+    `split="templates"`: every worker scans the full frame with a subset of templates.
+    `split="tiles"`: every worker scans one column tile (plus template-width overlap)
+    with all templates and keeps only matches centred in its own columns.
+    Worker 0 additionally checks for the game-over screen.
+    """
+    from subway_ai.detection.template_matcher import load_templates, match_template
+    from subway_ai.detection.state_extractor import closest_objects_per_lane
+
+    ring = SharedFrameRing(_frame_shape(), n_slots, name=ring_name)
+    height, width = ring.shape
+    frame = np.empty(ring.shape, dtype=np.uint8)
+
+    templates = load_templates()
+    game_over_template = templates.get("game_over") if worker_id == 0 else None
+    if split == "tiles":
+        my_templates = split_templates(templates, 1)[0]
+        keep_x_range = tile_columns(width, n_workers)[worker_id]
+        overlap = max((img.shape[1] for img in my_templates.values()), default=0)
+        x_start = max(keep_x_range[0] - overlap, 0)
+        x_end = min(keep_x_range[1] + overlap, width)
+    else:
+        my_templates = split_templates(templates, n_workers)[worker_id]
+        keep_x_range, x_start, x_end = None, 0, width
+
+    try:
+        while not stop_event.is_set():
+            try:
+                seq = job_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            frame_out, capture_time = ring.read(seq, out=frame)
+            if frame_out is None: # Frame was overwritten before we got to it
+                result_queue.put((seq, worker_id, None, None, None, False, 0.0))
+                continue
+
+            types, y_bottoms = closest_objects_per_lane(
+                frame[:, x_start:x_end], my_templates,
+                x_offset=x_start, screen_width=width, keep_x_range=keep_x_range)
+            is_over = False
+            if game_over_template is not None:
+                is_over = len(match_template(frame, game_over_template,
+                                             threshold=config.CRITICAL_MATCH_THRESHOLD)) > 0
+            detect_ms = (time.perf_counter() - start) * 1000.0
+            result_queue.put((seq, worker_id, capture_time, types, y_bottoms, is_over, detect_ms))
+    finally:
+        ring.close()
+
+
+def _report(latencies_ms, n_actions, elapsed, frames_captured, dropped_rounds, detect_ms):
+    p50, p95 = np.percentile(latencies_ms, [50, 95])
+    print(f"[policy] actions: {n_actions} ({n_actions / elapsed:.1f}/s) | "
+          f"capture: {frames_captured / elapsed:.1f} fps | "
+          f"frame-to-key latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {np.max(latencies_ms):.1f} ms | "
+          f"detect/worker {np.mean(detect_ms):.1f} ms | dropped rounds: {dropped_rounds}")
+
+
+def policy_stage(ring_name, n_slots, job_queues, result_queue, stop_event, model_path, max_inflight, report_every):
+    """
+    Dispatches the newest captured frame to all detection workers, merges their
+    partial results and acts on the freshest *completed* detection. Results for
+    frames older than the last one acted on are dropped.
+    """
+    from stable_baselines3 import PPO
+    from subway_ai.detection.state_extractor import merge_lane_objects
+    import pyautogui
+    from subway_ai.utils.key_controller import perform_action, press_start_key
+
+    # key_controller's 50 ms PAUSE (+ post-press sleep) would cap the action rate
+    pyautogui.PAUSE = config.PIPELINE_KEY_PAUSE
+
+    ring = SharedFrameRing(_frame_shape(), n_slots, name=ring_name)
+    model = PPO.load(model_path, device="cpu")
+    n_workers = len(job_queues)
+
+    inflight = {} # seq -> {"partials": [...], "capture_time": float, "game_over": bool, "stale": bool}
+    last_dispatched = -1
+    last_acted = -1
+    latencies_ms, detect_ms = [], []
+    n_actions, dropped_rounds = 0, 0
+    start_seq, start = None, time.perf_counter()
+
+    try:
+        while not stop_event.is_set():
+            # --- Dispatch the newest frame if there is room in flight ---
+            latest = ring.latest_seq
+            if latest > last_dispatched and len(inflight) < max_inflight:
+                if start_seq is None:
+                    start_seq, start = latest, time.perf_counter()
+                for job_queue in job_queues:
+                    job_queue.put(latest)
+                inflight[latest] = {"partials": [], "capture_time": None, "game_over": False, "stale": False}
+                last_dispatched = latest
+
+            # --- Collect partial detections ---
+            try:
+                seq, worker_id, capture_time, types, y_bottoms, is_over, worker_ms = result_queue.get(timeout=0.001)
+            except queue.Empty:
+                continue
+            detection = inflight.get(seq)
+            if detection is None:
+                continue
+            if capture_time is None:
+                detection["stale"] = True
+            else:
+                detection["partials"].append((types, y_bottoms))
+                detection["capture_time"] = capture_time
+                detection["game_over"] |= is_over
+                detect_ms.append(worker_ms)
+            if not detection["stale"] and len(detection["partials"]) < n_workers:
+                continue
+
+            # --- Round complete (or unusable) ---
+            del inflight[seq]
+            if detection["stale"] or seq < last_acted:
+                dropped_rounds += 1
+                continue
+            last_acted = seq
+
+            if detection["game_over"]:
+                print("[policy] Game over detected. Restarting...")
+                press_start_key()
+                continue
+
+            state = merge_lane_objects(detection["partials"])
+            action, _ = model.predict(state, deterministic=True)
+            # Latency is measured to when the key press is issued, not including pyautogui's pause
+            latencies_ms.append((time.perf_counter() - detection["capture_time"]) * 1000.0)
+            perform_action(int(action), post_delay=config.PIPELINE_KEY_POST_DELAY)
+            n_actions += 1
+
+            if n_actions % report_every == 0:
+                _report(latencies_ms[-report_every:], n_actions, time.perf_counter() - start,
+                        ring.latest_seq - start_seq, dropped_rounds, detect_ms[-report_every * n_workers:])
+    finally:
+        if latencies_ms:
+            print("\n[policy] ----- Pipeline Summary -----")
+            _report(latencies_ms, n_actions, time.perf_counter() - start,
+                    ring.latest_seq - start_seq, dropped_rounds, detect_ms)
+        ring.close()
+
+
+def run_pipeline(model_path=None, n_detect_workers=config.PIPELINE_DETECT_WORKERS,
+                 split=config.PIPELINE_SPLIT, duration=None):
+    """
+    Plays the live game with capture, detection and policy in separate processes.
+
+    Args:
+        model_path (str): Trained model (defaults to MODEL_DIR/EVAL_MODEL_NAME).
+        n_detect_workers (int): Detection processes.
+        split (str): "templates" or "tiles" (how detection work is divided).
+        duration (float): Seconds to run; runs until Ctrl+C when None.
+
+    Returns:
+        bool: False if the pipeline could not start.
+    """
+    if split not in ("templates", "tiles"):
+        raise ValueError(f"Unknown PIPELINE_SPLIT '{split}'. Use 'templates' or 'tiles'.")
+    model_path = model_path or os.path.join(config.MODEL_DIR, config.EVAL_MODEL_NAME)
+    if not os.path.exists(model_path):
+        print(f"Error: Model file not found at {model_path}")
+        return False
+
+    print("----- Starting Pipelined Live Runtime -----")
+    print(f"Capture -> {n_detect_workers} detection worker(s) (split by {split}) -> policy")
+    print("IMPORTANT: Ensure the game window has focus!")
+
+    n_slots = config.PIPELINE_FRAME_SLOTS
+    ring = SharedFrameRing(_frame_shape(), n_slots, create=True)
+    ctx = mp.get_context("spawn") # Same behaviour on Windows/macOS/Linux
+    stop_event = ctx.Event()
+    job_queues = [ctx.Queue() for _ in range(n_detect_workers)]
+    result_queue = ctx.Queue()
+
+    processes = [ctx.Process(target=capture_stage, name="capture",
+                             args=(ring.name, n_slots, stop_event, config.PIPELINE_CAPTURE_FPS))]
+    processes += [ctx.Process(target=detect_stage, name=f"detect-{i}",
+                              args=(i, n_detect_workers, split, ring.name, n_slots,
+                                    job_queues[i], result_queue, stop_event))
+                  for i in range(n_detect_workers)]
+    processes.append(ctx.Process(target=policy_stage, name="policy",
+                                 args=(ring.name, n_slots, job_queues, result_queue, stop_event,
+                                       model_path, config.PIPELINE_MAX_INFLIGHT, config.PIPELINE_REPORT_EVERY)))
+
+    try:
+        for process in processes:
+            process.start()
+        deadline = time.perf_counter() + duration if duration else None
+        while all(p.is_alive() for p in processes):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("\nPipeline interrupted by user.")
+    finally:
+        stop_event.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        ring.close()
+        ring.unlink()
+
+    print("\n----- Pipeline Stopped -----")
+    return True
+
+
+# Example usage: python cli.py pipeline (or: python -m subway_ai.pipeline.live_pipeline)
+if __name__ == "__main__":
+    run_pipeline()
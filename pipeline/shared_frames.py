@@ -0,0 +1,84 @@
+# pipeline/shared_frames.py
+import numpy as np
+from multiprocessing import shared_memory
+
+
+class SharedFrameRing:
+    """
+    Fixed-size ring of grayscale frame slots in shared memory.
+
+    One writer (the capture process) fills slots in order and publishes a
+    monotonically increasing sequence number per slot; any number of readers
+    copy a slot out and re-check its sequence number afterwards (seqlock), so a
+    frame overwritten mid-copy is detected instead of silently torn.
+
+    Layout: [latest_seq int64][slot_seq int64 * n][slot_time float64 * n][frames uint8 * n*H*W]
+    """
+
+    def __init__(self, shape, n_slots, name=None, create=False):
+        self.shape = tuple(shape)
+        self.n_slots = n_slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = 8 * (1 + 2 * n_slots)
+        size = header_bytes + n_slots * frame_bytes
+
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        buf = self.shm.buf
+        self._latest = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        self._slot_seq = np.ndarray((n_slots,), dtype=np.int64, buffer=buf, offset=8)
+        self._slot_time = np.ndarray((n_slots,), dtype=np.float64, buffer=buf, offset=8 * (1 + n_slots))
+        self._frames = np.ndarray((n_slots,) + self.shape, dtype=np.uint8, buffer=buf, offset=header_bytes)
+        if create:
+            self._latest[0] = -1
+            self._slot_seq[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        """Sequence number of the newest complete frame (-1 before the first one)."""
+        return int(self._latest[0])
+
+    # --- Writer side ---
+    def begin_write(self, seq):
+        """Marks the slot for `seq` as being written and returns it as a writable view."""
+        slot = seq % self.n_slots
+        self._slot_seq[slot] = -1
+        return self._frames[slot]
+
+    def end_write(self, seq, capture_time):
+        """Publishes the frame for `seq` (captured at `capture_time`, `time.perf_counter`)."""
+        slot = seq % self.n_slots
+        self._slot_time[slot] = capture_time
+        self._slot_seq[slot] = seq
+        self._latest[0] = seq
+
+    # --- Reader side ---
+    def read(self, seq, out=None):
+        """
+        Copies frame `seq` out of shared memory.
+
+        Returns:
+            tuple: (frame, capture_time), or (None, None) if the slot no longer
+                   (or not yet) holds `seq`.
+        """
+        slot = seq % self.n_slots
+        if self._slot_seq[slot] != seq:
+            return None, None
+        capture_time = float(self._slot_time[slot])
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        np.copyto(out, self._frames[slot])
+        if self._slot_seq[slot] != seq: # Overwritten while copying
+            return None, None
+        return out, capture_time
+
+    def close(self):
+        # Drop views into the buffer before closing the mapping
+        self._latest = self._slot_seq = self._slot_time = self._frames = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+import sys
+
+# Same import setup as cli.py: `subway_ai.*` (parent dir) and plain `config` (repo dir)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (os.path.dirname(_ROOT), _ROOT):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
@@ -0,0 +1,29 @@
+# tests/test_simulator.py
+import numpy as np
+
+from subway_ai.env.simulator import ACTION_NOOP, VectorSubwaySim
+
+
+def _mean_reward(rules, policy, n_episodes=128):
+    sim = VectorSubwaySim(n_episodes, max_steps=200, seed=0, rules=rules)
+    obs = sim.reset()
+    rng = np.random.default_rng(1)
+    while not sim.done.all():
+        obs, _, _ = sim.step(policy(obs, rng))
+    return sim.episode_rewards.mean(), sim.steps.mean()
+
+
+def _noop(obs, rng):
+    return np.full(len(obs), ACTION_NOOP)
+
+
+def _random(obs, rng):
+    return rng.integers(0, 5, len(obs))
+
+
+def test_subway_env_coins_depends_on_policy():
+    noop_reward, noop_length = _mean_reward("subway_env_coins", _noop)
+    random_reward, random_length = _mean_reward("subway_env_coins", _random)
+
+    assert noop_length == random_length == 200 # No lethal spawns, so nothing ends an episode early
+    assert abs(noop_reward - random_reward) > 1.0
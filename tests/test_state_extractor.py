@@ -0,0 +1,24 @@
+# tests/test_state_extractor.py
+import numpy as np
+
+import config
+from subway_ai.detection.state_extractor import merge_lane_objects
+
+CLEAR = config.OBSTACLE_TYPES["clear"]
+COIN = config.OBSTACLE_TYPES["coin"]
+TRAIN = config.OBSTACLE_TYPES["train"]
+BARRIER_LOW = config.OBSTACLE_TYPES["barrier_low"]
+
+
+def test_merge_keeps_lethal_obstacle_behind_closer_coin():
+    obstacles = (np.array([TRAIN, CLEAR, BARRIER_LOW]), np.array([300, 481, 250]))
+    coins = (np.array([COIN, COIN, COIN]), np.array([200, 220, 260]))
+
+    assert merge_lane_objects([obstacles, coins]).tolist() == [TRAIN, COIN, BARRIER_LOW]
+
+
+def test_merge_picks_closest_lethal_obstacle():
+    trains = (np.array([TRAIN, CLEAR, CLEAR]), np.array([300, 481, 481]))
+    barriers = (np.array([BARRIER_LOW, CLEAR, CLEAR]), np.array([250, 481, 481]))
+
+    assert merge_lane_objects([trains, barriers]).tolist() == [BARRIER_LOW, CLEAR, CLEAR]
@@ -0,0 +1,42 @@
+# tests/test_subway_env.py
+import numpy as np
+import pytest
+
+pytest.importorskip("mss")
+pytest.importorskip("pyautogui")
+
+import subway_ai.env.subway_env as subway_env
+
+
+def _coins_paid(monkeypatch, approaching, lane_changes=()):
+    """Runs `_detect` on a sequence of approaching-coin counts; returns the coins paid per detection."""
+    counts = iter(approaching)
+    monkeypatch.setattr(subway_env, "closest_objects_per_lane",
+                        lambda *args, **kwargs: (np.zeros(3, dtype=np.int32), np.full(3, 481)))
+    monkeypatch.setattr(subway_env, "detect_coins", lambda frame: {
+        "approaching": next(counts), "lane_counts": np.zeros(3, dtype=np.int64), "lane_closest_y": np.full(3, 481)})
+    env = subway_env.SubwayEnv.__new__(subway_env.SubwayEnv)
+    env.color_coins = True
+    env.object_templates = {}
+    env.last_screen_raw_gray = np.zeros((480, 640), dtype=np.uint8)
+    env.last_coins_approaching = 0
+    env.stable_coins_approaching = None
+    paid = []
+    for i in range(len(approaching)):
+        env.changed_lane = i in lane_changes
+        env._detect(None)
+        paid.append(env.last_coins_collected)
+    return paid
+
+
+def test_single_missed_detection_pays_nothing(monkeypatch):
+    assert sum(_coins_paid(monkeypatch, [2, 2, 1, 2, 2])) == 0
+    assert sum(_coins_paid(monkeypatch, [0, 0, 1, 0, 0])) == 0
+
+
+def test_each_collected_coin_is_paid_once(monkeypatch):
+    assert _coins_paid(monkeypatch, [2, 2, 1, 1, 0, 0]) == [0, 0, 0, 1, 0, 1]
+
+
+def test_lane_change_pays_nothing(monkeypatch):
+    assert sum(_coins_paid(monkeypatch, [2, 2, 0, 0], lane_changes={2})) == 0
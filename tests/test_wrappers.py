@@ -0,0 +1,76 @@
+# tests/test_wrappers.py
+import gymnasium as gym
+import numpy as np
+
+from subway_ai.env.wrappers import NOOP_ACTION, AdaptiveFrameSkip, TraceRecorder
+from subway_ai.tracing.analytics import export_recorded_states
+from subway_ai.tracing.trace_store import open_trace
+
+
+class ScriptedEnv(gym.Env):
+    """Returns a fixed sequence of observations; the episode ends after the last one."""
+
+    def __init__(self, observations):
+        self.action_space = gym.spaces.Discrete(5)
+        self.observation_space = gym.spaces.MultiDiscrete([6] * 3)
+        self.observations = [np.array(obs, dtype=np.int32) for obs in observations]
+        self.actions = []
+
+    def reset(self, seed=None, options=None):
+        self.t = 0
+        return np.zeros(3, dtype=np.int32), {}
+
+    def step(self, action):
+        self.actions.append(int(action))
+        obs = self.observations[self.t]
+        self.t += 1
+        done = self.t == len(self.observations)
+        return obs, 0.1, done, False, {"reason": "game_over"} if done else {}
+
+
+def _run(env, action, trace_dir, **skip_kwargs):
+    recorder = TraceRecorder(env, tag="test", trace_dir=str(trace_dir))
+    wrapped = AdaptiveFrameSkip(recorder, **skip_kwargs)
+    wrapped.reset()
+    policy_calls, done = 0, False
+    while not done:
+        _, _, done, _, _ = wrapped.step(action)
+        policy_calls += 1
+    wrapped.close()
+    return policy_calls, open_trace(recorder.run_dir)
+
+
+def test_adaptive_noops_are_not_policy_steps(tmp_path):
+    env = ScriptedEnv([[0, 0, 0]] * 7)
+    policy_calls, trace = _run(env, 1, tmp_path, repeat=1, adaptive=True, max_skip=3, skip_detection=False)
+
+    assert len(trace["step"]) == 7
+    assert trace["policy_step"].sum() == policy_calls < 7
+    assert (trace["action"][trace["policy_step"] == 1] == 1).all()
+    assert (trace["action"][trace["policy_step"] == 0] == NOOP_ACTION).all()
+
+
+def test_repeat_steps_are_not_policy_steps(tmp_path):
+    env = ScriptedEnv([[0, 0, 0]] * 6)
+    policy_calls, trace = _run(env, 1, tmp_path, repeat=3, adaptive=False)
+
+    assert policy_calls == 2
+    assert trace["policy_step"].tolist() == [1, 0, 0, 1, 0, 0]
+
+
+def test_repeat_sends_each_action_once(tmp_path):
+    env = ScriptedEnv([[0, 0, 0]] * 6)
+    _run(env, 1, tmp_path, repeat=3, adaptive=False)
+
+    assert env.actions == [1, NOOP_ACTION, NOOP_ACTION] * 2
+
+
+def test_export_keeps_terminal_observation(tmp_path):
+    lethal = [3, 0, 0]
+    env = ScriptedEnv([[0, 1, 0], [0, 0, 1], lethal])
+    _, trace = _run(env, 1, tmp_path, repeat=1, adaptive=False)
+    export_recorded_states(trace, tmp_path / "states.npz")
+
+    data = np.load(tmp_path / "states.npz")
+    assert data["states"].tolist() == [[0, 0, 0], [0, 1, 0], [0, 0, 1], lethal]
+    assert data["episode_starts"].tolist() == [0]
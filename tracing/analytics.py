@@ -0,0 +1,191 @@
+# tracing/analytics.py
+import sys
+import time
+
+import numpy as np
+
+import subway_ai.config as config
+from subway_ai.tracing.trace_store import DONE_REASONS, open_trace
+
+# Everything here is whole-column NumPy (bincount / cumsum / reduceat), no per-step Python loops.
+
+TYPE_NAMES = {type_id: name for name, type_id in config.OBSTACLE_TYPES.items()}
+
+
+def encode_states(states):
+    """Packs (N, 3) lane states into single integers (base NUM_OBSTACLE_TYPES)."""
+    base = config.NUM_OBSTACLE_TYPES
+    states = states.astype(np.int64)
+    return (states[:, 0] * base + states[:, 1]) * base + states[:, 2]
+
+
+def decode_state(code):
+    """Inverse of `encode_states` for one code. Returns a (lane0, lane1, lane2) tuple."""
+    base = config.NUM_OBSTACLE_TYPES
+    return (code // (base * base), (code // base) % base, code % base)
+
+
+def death_causes(trace):
+    """
+    Counts how episodes ended.
+
+    Returns:
+        dict: Done reason -> number of episodes.
+    """
+    counts = np.bincount(trace["done_reason"], minlength=len(DONE_REASONS))
+    return {reason: int(counts[code]) for code, reason in enumerate(DONE_REASONS) if code and counts[code]}
+
+
+def policy_step_mask(trace):
+    """
+    Boolean mask of records where the policy chose the action (excludes
+    `AdaptiveFrameSkip` repeats and no-ops). Traces written before the
+    `policy_step` column existed count every record as a policy step.
+    """
+    if "policy_step" not in trace:
+        return np.ones(len(trace["action"]), dtype=bool)
+    return np.asarray(trace["policy_step"]) != 0
+
+
+def action_distribution_by_state(trace, normalize=True):
+    """
+    Builds the action histogram for every lane state the policy acted on
+    (wrapper repeats and no-ops are left out, see `policy_step_mask`).
+
+    Returns:
+        tuple: (states, counts) where `states` is a (S, 3) array of observed lane
+               states and `counts` an (S, NUM_ACTIONS) array (row-normalized if
+               `normalize`), ordered by how often the state occurs.
+    """
+    n_states = config.NUM_OBSTACLE_TYPES ** 3
+    mask = policy_step_mask(trace)
+    codes = encode_states(np.asarray(trace["state"])[mask])
+    actions = np.asarray(trace["action"])[mask].astype(np.int64)
+    table = np.bincount(codes * config.NUM_ACTIONS + actions,
+                        minlength=n_states * config.NUM_ACTIONS).reshape(n_states, config.NUM_ACTIONS)
+    totals = table.sum(axis=1)
+    observed = np.flatnonzero(totals)
+    observed = observed[np.argsort(totals[observed])[::-1]]
+    counts = table[observed].astype(np.float64)
+    if normalize:
+        counts /= totals[observed, None]
+    states = np.array([decode_state(code) for code in observed], dtype=np.int32).reshape(-1, 3)
+    return states, counts
+
+
+def episode_stats(trace):
+    """
+    Per-episode totals.
+
+    Returns:
+        dict: `episode` ids, `reward` totals, `length` in steps and final `done_reason` codes.
+    """
+    episodes = trace["episode"]
+    if len(episodes) == 0:
+        empty = np.zeros(0)
+        return {"episode": empty.astype(np.int32), "reward": empty, "length": empty.astype(np.int64),
+                "done_reason": empty.astype(np.uint8)}
+    # Episodes are contiguous in the trace, so segment boundaries are where the id changes
+    starts = np.flatnonzero(np.r_[True, episodes[1:] != episodes[:-1]])
+    ends = np.r_[starts[1:], len(episodes)]
+    return {
+        "episode": np.asarray(episodes[starts]),
+        "reward": np.add.reduceat(trace["reward"].astype(np.float64), starts),
+        "length": ends - starts,
+        "done_reason": np.asarray(trace["done_reason"][ends - 1]),
+    }
+
+
+def reward_curve(trace, window=config.TRACE_CURVE_WINDOW):
+    """
+    Moving average of episode reward (over `window` episodes), for plotting
+    learning progress across a run.
+
+    Returns:
+        numpy.ndarray: One value per episode (shorter windows at the start).
+    """
+    rewards = episode_stats(trace)["reward"]
+    if len(rewards) == 0:
+        return rewards
+    cumsum = np.cumsum(np.r_[0.0, rewards])
+    idx = np.arange(1, len(rewards) + 1)
+    lo = np.maximum(idx - window, 0)
+    return (cumsum[idx] - cumsum[lo]) / (idx - lo)
+
+
+def timing_summary(trace):
+    """Returns p50/p95/max (ms) for each timing column."""
+    summary = {}
+    for column in ("step_ms", "capture_ms", "detect_ms"):
+        values = np.asarray(trace[column], dtype=np.float64)
+        if len(values):
+            p50, p95 = np.percentile(values, [50, 95])
+            summary[column] = {"p50": p50, "p95": p95, "max": float(values.max())}
+    return summary
+
+
+def export_recorded_states(trace, path):
+    """
+    Saves the trace's lane states as an `.npz` usable as recorded episodes by
+    `agent.evaluate_checkpoints` (`states` + `episode_starts`).
+
+    Each episode ends with its last `next_state`: `SubwayEnv` ends an episode as
+    soon as a lethal obstacle is seen, so that obstacle only appears there.
+    Traces written before the `next_state` column existed lack it.
+    """
+    episodes = np.asarray(trace["episode"])
+    states = np.asarray(trace["state"])
+    if len(episodes) == 0:
+        np.savez_compressed(path, states=states, episode_starts=np.array([0]))
+        return
+    starts = np.flatnonzero(np.r_[True, episodes[1:] != episodes[:-1]])
+    if "next_state" in trace:
+        ends = np.r_[starts[1:], len(episodes)]
+        states = np.insert(states, ends, np.asarray(trace["next_state"])[ends - 1], axis=0)
+        starts = starts + np.arange(len(starts)) # Shifted by the rows inserted before them
+    np.savez_compressed(path, states=states, episode_starts=starts)
+
+
+def summarize(run_dir):
+    """Prints death causes, per-state action distributions, reward curve and timings for a run."""
+    start = time.perf_counter()
+    trace = open_trace(run_dir)
+    n_steps = len(trace["step"])
+    print(f"----- Trace Summary: {run_dir} ({n_steps} steps) -----")
+    if n_steps == 0:
+        print("Trace is empty.")
+        return
+
+    stats = episode_stats(trace)
+    print(f"\nEpisodes: {len(stats['episode'])} | mean reward {stats['reward'].mean():.2f} | "
+          f"mean length {stats['length'].mean():.1f} steps")
+
+    print("\nDeath causes:")
+    for reason, count in death_causes(trace).items():
+        print(f"  {reason:<16} {count}")
+
+    n_policy = int(policy_step_mask(trace).sum())
+    print(f"\nAction distribution per state ({n_policy} policy steps, "
+          f"{n_steps - n_policy} wrapper repeats/no-ops excluded; most frequent states):")
+    states, dist = action_distribution_by_state(trace)
+    for state, row in zip(states[:10], dist[:10]):
+        state_names = "/".join(TYPE_NAMES.get(int(t), str(t)) for t in state)
+        print(f"  {state_names:<36} " + " ".join(f"{p:5.2f}" for p in row))
+
+    curve = reward_curve(trace)
+    print(f"\nReward curve ({config.TRACE_CURVE_WINDOW}-episode mean): "
+          f"first {curve[0]:.2f} -> last {curve[-1]:.2f}, best {curve.max():.2f}")
+
+    print("\nTimings (ms):")
+    for column, values in timing_summary(trace).items():
+        print(f"  {column:<11} p50 {values['p50']:.1f}, p95 {values['p95']:.1f}, max {values['max']:.1f}")
+
+    print(f"\nAnalysed in {(time.perf_counter() - start) * 1000.0:.0f} ms")
+
+
+# Example usage: python -m subway_ai.tracing.analytics traces/train_20250101_120000
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m subway_ai.tracing.analytics <run_dir>")
+    else:
+        summarize(sys.argv[1])
@@ -0,0 +1,133 @@
+# tracing/trace_store.py
+import json
+import os
+import time
+
+import numpy as np
+
+# Done reasons are stored as small integer codes; index 0 means the episode continues.
+DONE_REASONS = ["", "game_over", "lethal_obstacle", "capture_failed", "truncated"]
+DONE_REASON_CODES = {reason: code for code, reason in enumerate(DONE_REASONS)}
+
+# Fixed-width record layout: column name -> (dtype, per-record shape)
+TRACE_COLUMNS = {
+    "step": (np.int64, ()),        # Global env step within the run
+    "episode": (np.int32, ()),
+    "timestamp": (np.float64, ()), # time.time() after the step
+    "state": (np.uint8, (3,)),     # Lane state the action was chosen on
+    "next_state": (np.uint8, (3,)), # Lane state after the step (the terminal one for the last step)
+    "action": (np.int8, ()),
+    "policy_step": (np.uint8, ()), # 1 if the policy chose `action` on `state`, 0 for wrapper repeats/no-ops
+    "reward": (np.float32, ()),
+    "done_reason": (np.uint8, ()), # Code into DONE_REASONS
+    "step_ms": (np.float32, ()),   # Whole env.step
+    "capture_ms": (np.float32, ()),
+    "detect_ms": (np.float32, ()),
+}
+
+META_FILENAME = "meta.json"
+
+
+class TraceWriter:
+    """
+    Append-only, columnar store of per-step records.
+
+    Records go into preallocated in-memory column buffers (one scalar write per
+    field, no allocation per step). Full blocks - or partial ones on `flush()` -
+    are appended to one raw `<column>.bin` file per column, and `meta.json`
+    records dtypes, shapes and the record count, so every column can be opened
+    with `np.memmap` (see `open_trace`).
+    """
+
+    def __init__(self, run_dir, block_size=4096):
+        self.run_dir = run_dir
+        self.block_size = block_size
+        os.makedirs(run_dir, exist_ok=True)
+
+        self._buffers = {name: np.zeros((block_size,) + shape, dtype=dtype)
+                         for name, (dtype, shape) in TRACE_COLUMNS.items()}
+        self._n = 0 # Records currently buffered
+        self.count = 0 # Records flushed to disk
+        self._files = {name: open(os.path.join(run_dir, f"{name}.bin"), "ab") for name in TRACE_COLUMNS}
+        self._write_meta()
+
+    def append(self, step, episode, state, action, reward, done_reason="", next_state=None,
+               step_ms=0.0, capture_ms=0.0, detect_ms=0.0, timestamp=None, policy_step=True):
+        """Buffers one record, flushing the block to disk when it is full."""
+        i = self._n
+        b = self._buffers
+        b["step"][i] = step
+        b["episode"][i] = episode
+        b["timestamp"][i] = time.time() if timestamp is None else timestamp
+        b["state"][i] = state
+        b["next_state"][i] = state if next_state is None else next_state
+        b["action"][i] = action
+        b["policy_step"][i] = policy_step
+        b["reward"][i] = reward
+        b["done_reason"][i] = DONE_REASON_CODES.get(done_reason, 0)
+        b["step_ms"][i] = step_ms
+        b["capture_ms"][i] = capture_ms
+        b["detect_ms"][i] = detect_ms
+        self._n += 1
+        if self._n == self.block_size:
+            self.flush()
+
+    def flush(self):
+        """Appends all buffered records to the column files."""
+        if self._n == 0:
+            return
+        for name, f in self._files.items():
+            f.write(self._buffers[name][:self._n].tobytes())
+            f.flush()
+        self.count += self._n
+        self._n = 0
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "count": self.count,
+            "columns": {name: {"dtype": np.dtype(dtype).str, "shape": list(shape)}
+                        for name, (dtype, shape) in TRACE_COLUMNS.items()},
+            "done_reasons": DONE_REASONS,
+        }
+        tmp_path = os.path.join(self.run_dir, META_FILENAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.run_dir, META_FILENAME)) # Readers never see a half-written meta
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+
+def new_run_dir(tag, trace_dir):
+    """Returns a fresh, not yet existing `<trace_dir>/<tag>_<YYYYmmdd_HHMMSS>[_n]` run directory path."""
+    base = os.path.join(trace_dir, f"{tag}_{time.strftime('%Y%m%d_%H%M%S')}")
+    run_dir, n = base, 1
+    while os.path.exists(run_dir): # Several envs started in the same second
+        run_dir = f"{base}_{n}"
+        n += 1
+    return run_dir
+
+
+def open_trace(run_dir):
+    """
+    Memory-maps a trace written by `TraceWriter` (read-only, nothing is loaded up front).
+
+    Returns:
+        dict: Column name -> numpy.memmap (or empty array) of length `count`.
+    """
+    with open(os.path.join(run_dir, META_FILENAME)) as f:
+        meta = json.load(f)
+    count = meta["count"]
+    columns = {}
+    for name, spec in meta["columns"].items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if count == 0:
+            columns[name] = np.zeros((0,) + shape, dtype=dtype)
+        else:
+            columns[name] = np.memmap(os.path.join(run_dir, f"{name}.bin"), dtype=dtype,
+                                      mode="r", shape=(count,) + shape)
+    return columns
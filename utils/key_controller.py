@@ -18,13 +18,14 @@ ACTION_MAP = {
 if len(ACTION_MAP) != config.NUM_ACTIONS:
      print(f"Warning: Mismatch between ACTION_MAP size ({len(ACTION_MAP)}) and config.NUM_ACTIONS ({config.NUM_ACTIONS})")
 
-def perform_action(action_index):
-    """Sends the corresponding keystroke for the action index."""
+def perform_action(action_index, post_delay=0.05):
+    """Sends the corresponding keystroke for the action index, then waits `post_delay` seconds."""
     key = ACTION_MAP.get(action_index)
     if key:
         # print(f"Action: {key}") # Debug
         pyautogui.press(key)
-        time.sleep(0.05) # Optional: Small delay after action
+        if post_delay:
+            time.sleep(post_delay) # Optional: Small delay after action
 
 def press_start_key():
     """Presses the key typically used to start/restart (e.g., Space)."""